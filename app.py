@@ -1,46 +1,30 @@
 import asyncio
+import contextlib
 import json
 import logging
 import os
 import re
 import random
-from datetime import datetime, time, timedelta
-from zoneinfo import ZoneInfo
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from aiohttp import web
 from aiogram import Bot, Dispatcher, F
 from aiogram.enums.parse_mode import ParseMode
-from aiogram.exceptions import TelegramForbiddenError
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
 from aiogram.filters import Command, CommandStart
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from dotenv import load_dotenv
 
-import asyncpg
-
-from db import (
-    add_reminder,
-    add_user,
-    fetch_due_reminders,
-    get_daily_state,
-    get_schedule_state,
-    init_db,
-    list_users,
-    list_pending_reminders,
-    get_quiz_state,
-    mark_reminders_sent,
-    remove_user,
-    set_quiz_state,
-    clear_quiz_state,
-    update_daily_state,
-    update_last_apology_date,
-    update_last_eat_date,
-    update_last_love_date,
-    update_last_quiz_date,
-    update_last_water_date,
-    update_user_lang,
-)
+from http_session import TunedAiohttpSession
+from storage import check_backend
+
+try:
+    import orjson
+except ImportError:  # optional, only used when HTTP_FAST_JSON=true
+    orjson = None
 
 load_dotenv()
 
@@ -53,14 +37,38 @@ WORDS_PER_DAY = int(os.getenv("WORDS_PER_DAY", "5"))
 PORT = int(os.getenv("PORT", "10000"))
 WORDS_FILE = os.getenv("WORDS_FILE", "words.json")
 SONGS_FILE = os.getenv("SONGS_FILE", "songs.json")
+BROADCASTS_FILE = os.getenv("BROADCASTS_FILE", "broadcasts.json")
 PAUSED_MODE = os.getenv("PAUSED_MODE", "true").lower() == "true"
-
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+HTTP_DNS_CACHE_SECONDS = int(os.getenv("HTTP_DNS_CACHE_SECONDS", "600"))
+HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", "60"))
+HTTP_BULK_TIMEOUT = int(os.getenv("HTTP_BULK_TIMEOUT", "60"))
+HTTP_FAST_JSON = os.getenv("HTTP_FAST_JSON", "false").lower() == "true"
+SEND_RATE_PER_SECOND = float(os.getenv("SEND_RATE_PER_SECOND", "20"))
+REMINDER_TICK_BUDGET = int(os.getenv("REMINDER_TICK_BUDGET", "600"))
+CATCHUP_BATCH_SIZE = int(os.getenv("CATCHUP_BATCH_SIZE", "100"))
+CATCHUP_STALE_MINUTES = int(os.getenv("CATCHUP_STALE_MINUTES", "30"))
+# What to do with reminders/broadcasts older than CATCHUP_STALE_MINUTES: send, late or drop.
+CATCHUP_POLICY = os.getenv("CATCHUP_POLICY", "late").lower()
+
+if CATCHUP_POLICY not in {"send", "late", "drop"}:
+    raise RuntimeError("CATCHUP_POLICY must be one of: send, late, drop")
 if not BOT_TOKEN:
     raise RuntimeError("BOT_TOKEN is required")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is required")
 
+# sqlite:///path.db selects the embedded single-node backend, anything else is Postgres.
+if DATABASE_URL.startswith("sqlite:///"):
+    import db_sqlite as db
+else:
+    import db
+
+check_backend(db)
+
 TZ = ZoneInfo(TZ_NAME)
+CATCHUP_STALE = timedelta(minutes=CATCHUP_STALE_MINUTES)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("bot")
@@ -68,6 +76,13 @@ logger = logging.getLogger("bot")
 TIME_RE = re.compile(r"(?i)\b(?:saat\s*)?(\d{1,2})[:.](\d{2})\b")
 TIME_HOUR_ONLY_TR = re.compile(r"(?i)\b(\d{1,2})\s*'?\s*(?:te|ta)\b")
 TIME_HOUR_ONLY_RU = re.compile(r"(?i)\b(?:в)\s*(\d{1,2})\b")
+RECUR_DAILY_RE = re.compile(r"(?i)\b(?:her\s*gün|каждый\s+день|ежедневно)\b")
+RECUR_WEEKLY_TR = re.compile(r"(?i)\bher\s+(pazartesi|salı|çarşamba|perşembe|cumartesi|cuma|pazar)\b")
+RECUR_WEEKLY_RU = re.compile(r"(?i)\bкажд\w*\s+(понедельник|вторник|сред|четверг|пятниц|суббот|воскресень)")
+WEEKDAYS = {
+    "pazartesi": 0, "salı": 1, "çarşamba": 2, "perşembe": 3, "cuma": 4, "cumartesi": 5, "pazar": 6,
+    "понедельник": 0, "вторник": 1, "сред": 2, "четверг": 3, "пятниц": 4, "суббот": 5, "воскресень": 6,
+}
 LOVE_TRIGGERS = {
     "tr": ["mert beni seviyor mu"],
     "ru": ["мерт меня любит", "мерт меня любит?"],
@@ -94,7 +109,11 @@ REPLIES = {
     "tr": {
         "start": START_MESSAGE,
         "reminder_set": "Tamam. {time} için hatırlatıcı kurdum.",
+        "reminder_set_recurring": "Tamam. {time} için tekrarlayan hatırlatıcı kurdum ({rule}).",
+        "recur_daily": "her gün",
+        "recur_weekly": "her hafta",
         "reminder_due": "Merhaba, bana '{text}' demiştin. Saat geldi, aksiyon almak ister misin ? )",
+        "reminder_late": "(Bot kapalıyken kaçırıldı, {minutes} dk gecikmeli.)",
         "daily_title": "*Words of the day*",
         "apology_reminder": "Я прошу прощения у Российской Федерации за то, что не говорю по-русски.",
         "eat_reminder": "📅 Событие запланировано!\nМерт, Даша и мама пойдут в театр в Омске.",
@@ -102,15 +121,24 @@ REPLIES = {
         "water_reminder": "💧 Su içmeyi unutma!",
         "reminders_empty": "Bekleyen hatırlatman yok.",
         "reminders_title": "Bekleyen hatırlatmalar:",
+        "reminder_cancelled": "Hatırlatıcı iptal edildi.",
+        "reminder_missing": "Bu hatırlatıcı artık yok.",
         "quiz_intro": "Ufak bir mola! Şimdi Quiz zamanı.",
         "quiz_question": "Kelime: {word}\nA) {a}\nB) {b}\nC) {c}\nCevabını A/B/C olarak yaz.",
         "quiz_correct": "Harika! Doğru cevap.",
         "quiz_wrong": "Yaklaştın! Doğru cevap {answer}.",
+        "timezone_current": "Saat dilimin: {tz}\nDeğiştirmek için: /timezone Europe/Moscow",
+        "timezone_set": "Tamam. Saat dilimini {tz} olarak ayarladım.",
+        "timezone_invalid": "Bu saat dilimini tanımıyorum. Örn: /timezone Europe/Moscow",
     },
     "ru": {
         "start": START_MESSAGE,
         "reminder_set": "Готово. Поставил напоминание на {time}.",
+        "reminder_set_recurring": "Готово. Поставил повторяющееся напоминание на {time} ({rule}).",
+        "recur_daily": "каждый день",
+        "recur_weekly": "каждую неделю",
         "reminder_due": "Привет! Ты просил(а): «{text}». Время пришло — хочешь заняться этим сейчас? )",
+        "reminder_late": "(Пропущено, пока бот был выключен, опоздание {minutes} мин.)",
         "daily_title": "*Words of the day*",
         "apology_reminder": "Я прошу прощения у Российской Федерации за то, что не говорю по-русски.",
         "eat_reminder": "📅 Событие запланировано!\nМерт, Даша и мама пойдут в театр в Омске.",
@@ -118,10 +146,15 @@ REPLIES = {
         "water_reminder": "💧 Не забудь попить воды!",
         "reminders_empty": "У тебя нет ожидающих напоминаний.",
         "reminders_title": "Ожидающие напоминания:",
+        "reminder_cancelled": "Напоминание отменено.",
+        "reminder_missing": "Этого напоминания уже нет.",
         "quiz_intro": "Небольшая пауза! Время мини‑викторины.",
         "quiz_question": "Слово: {word}\nA) {a}\nB) {b}\nC) {c}\nОтветь A/B/C.",
         "quiz_correct": "Отлично! Правильный ответ.",
         "quiz_wrong": "Почти! Правильный ответ: {answer}.",
+        "timezone_current": "Твой часовой пояс: {tz}\nЧтобы изменить: /timezone Europe/Moscow",
+        "timezone_set": "Готово. Поставил часовой пояс {tz}.",
+        "timezone_invalid": "Не знаю такой часовой пояс. Например: /timezone Europe/Moscow",
     },
 }
 
@@ -140,6 +173,78 @@ def load_songs() -> list[dict]:
 
 
 SONGS = load_songs()
+SONG_GENRES = sorted({song["genre"] for song in SONGS if song.get("genre")})
+SONG_ARTISTS = sorted({song["artist"] for song in SONGS if song.get("artist")})
+
+
+def build_song_pools() -> dict:
+    # Song indexes per filter: None for all songs, ("g", i) per genre, ("a", i) per artist.
+    pools = {None: list(range(len(SONGS)))}
+    for kind, field, values in (("g", "genre", SONG_GENRES), ("a", "artist", SONG_ARTISTS)):
+        for index, value in enumerate(values):
+            pools[(kind, index)] = [i for i, song in enumerate(SONGS) if song.get(field) == value]
+    return pools
+
+
+SONG_POOLS = build_song_pools()
+SONG_POOL_MASKS = {key: sum(1 << i for i in indexes) for key, indexes in SONG_POOLS.items()}
+SONG_STATE_FLUSH_SECONDS = int(os.getenv("SONG_STATE_FLUSH_SECONDS", "300"))
+# Songs already shown per chat, as an int bitset over SONGS indexes. Kept in memory and
+# written to song_state by flush_song_state, so "Next" taps never wait on the DB.
+SONG_SEEN: dict[int, int] = {}
+SONG_SEEN_DIRTY: set[int] = set()
+
+
+BROADCAST_KINDS = {"words", "quiz", "text"}
+
+
+def validate_broadcast(slot) -> str | None:
+    if not isinstance(slot, dict):
+        return "entry is not an object"
+    if not isinstance(slot.get("key"), str) or not slot["key"]:
+        return "missing key"
+    for field, limit in (("hour", 23), ("minute", 59)):
+        value = slot.get(field)
+        if not isinstance(value, int) or isinstance(value, bool) or not 0 <= value <= limit:
+            return f"{field} must be an integer between 0 and {limit}"
+    kind = slot.get("kind", "text")
+    if kind not in BROADCAST_KINDS:
+        return f"kind must be one of: {', '.join(sorted(BROADCAST_KINDS))}"
+    if kind == "text" and any(slot.get("reply") not in replies for replies in REPLIES.values()):
+        return f"reply {slot.get('reply')!r} is not a REPLIES key"
+    return None
+
+
+def load_broadcasts() -> list[dict]:
+    with open(BROADCASTS_FILE, "r", encoding="utf-8") as f:
+        slots = json.load(f)
+    # Daily words keep following DAILY_HOUR/DAILY_MINUTE from the environment.
+    words_slot = {"key": "daily_words", "hour": DAILY_HOUR, "minute": DAILY_MINUTE, "kind": "words"}
+    if not isinstance(slots, list):
+        raise RuntimeError(f"{BROADCASTS_FILE} must contain a list of broadcasts")
+    # A bad entry would otherwise only fail when its slot fires, and keep failing every retry.
+    seen = {words_slot["key"]}
+    for index, slot in enumerate(slots):
+        error = validate_broadcast(slot)
+        if error is None and slot["key"] in seen:
+            error = "duplicate key"
+        if error:
+            raise RuntimeError(f"{BROADCASTS_FILE}: entry {index}: {error}")
+        seen.add(slot["key"])
+    return [words_slot] + slots
+
+
+BROADCASTS = load_broadcasts()
+BROADCAST_RETRY_SECONDS = 60
+# Re-check the wall clock at least this often so host suspends and clock jumps are noticed.
+BROADCAST_MAX_SLEEP_SECONDS = 300
+# Timezones that have at least one user; the broadcast loop keeps one bucket per zone and slot.
+USER_TIMEZONES: set[str] = {TZ_NAME}
+BROADCAST_WAKEUP = asyncio.Event()
+REMINDERS_PAGE_SIZE = 10
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+METRICS = {"catchup_lag_seconds": 0.0}
+_next_send_at = 0.0
 
 
 def detect_lang(text: str) -> str:
@@ -175,6 +280,28 @@ def parse_time_from_text(text: str):
     return time(hour=hour, minute=minute)
 
 
+def parse_recurrence(text: str):
+    if RECUR_DAILY_RE.search(text):
+        return "daily", None
+    match = RECUR_WEEKLY_TR.search(text) or RECUR_WEEKLY_RU.search(text)
+    weekday = WEEKDAYS.get(match.group(1).lower()) if match else None
+    if weekday is not None:
+        return "weekly", weekday
+    return None
+
+
+def next_occurrence(remind_at: datetime, recur: str, user_tz: ZoneInfo, now: datetime) -> datetime:
+    # Keep the local wall-clock time across DST changes and skip occurrences missed while down.
+    step = timedelta(days=7 if recur == "weekly" else 1)
+    local = remind_at.astimezone(user_tz)
+    day = local.date()
+    while True:
+        day += step
+        candidate = datetime.combine(day, local.time(), tzinfo=user_tz)
+        if candidate > now:
+            return candidate
+
+
 def build_quiz():
     if len(WORDS) < 4:
         return None
@@ -190,120 +317,142 @@ def build_quiz():
     return word["word"], options, correct_letter
 
 
-async def send_daily_words(bot: Bot, pool: asyncpg.Pool) -> None:
-    today = datetime.now(TZ).date()
-    last_date, last_index = await get_daily_state(pool)
-    if last_date == today:
-        return
+def words_for_date(day) -> list[dict]:
+    # Derived from the date so every timezone bucket gets the same words on the same local day.
+    start = (day.toordinal() * WORDS_PER_DAY) % len(WORDS)
+    return [WORDS[i % len(WORDS)] for i in range(start, start + WORDS_PER_DAY)]
+
 
+async def send_daily_words(bot: Bot, pool: db.Pool, users: list, day) -> None:
     if not WORDS:
         logger.warning("Words list is empty")
         return
 
-    start = last_index % len(WORDS)
-    end = start + WORDS_PER_DAY
-    slice_words = [WORDS[i % len(WORDS)] for i in range(start, end)]
-
-    users = await list_users(pool)
+    slice_words = words_for_date(day)
     for chat_id, lang in users:
         lines = [REPLIES.get(lang, REPLIES["tr"])["daily_title"]]
         for w in slice_words:
             lines.append(f"• {w['word']} — {w['tr']} ({w.get('note','')})")
         message = "\n".join(lines)
+        await wait_send_budget()
         try:
-            await bot.send_message(chat_id, message, parse_mode=ParseMode.MARKDOWN)
+            await bot.send_message(
+                chat_id, message, parse_mode=ParseMode.MARKDOWN, request_timeout=HTTP_BULK_TIMEOUT
+            )
         except TelegramForbiddenError:
-            await remove_user(pool, chat_id)
+            await db.remove_user(pool, chat_id)
         except Exception:
             logger.exception("Failed to send daily words to %s", chat_id)
 
-    await update_daily_state(pool, today, end % len(WORDS))
 
+async def wait_send_budget() -> None:
+    # Reserve the next send slot; broadcasts and reminders share the same budget.
+    global _next_send_at
+    now = asyncio.get_running_loop().time()
+    delay = _next_send_at - now
+    _next_send_at = max(now, _next_send_at) + 1 / SEND_RATE_PER_SECOND
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+async def process_due_reminders(
+    bot: Bot, pool: db.Pool, until: datetime, cursor, now: datetime, budget: int
+) -> int:
+    # The budget counts send attempts, so a run of failing sends cannot stretch a tick either.
+    attempts = 0
+    dropped = 0
+    given_up = 0
+    while attempts < budget:
+        page = await db.fetch_due_reminders(pool, until, limit=CATCHUP_BATCH_SIZE, cursor=cursor)
+        if not page:
+            break
+
+        done_ids = []
+        rescheduled = []
+        for reminder_id, chat_id, text, remind_at, recur, tz_name in page:
+            if attempts >= budget:
+                break
+            cursor = (remind_at, reminder_id)
+            lag = now - remind_at
+            action = CATCHUP_POLICY if lag > CATCHUP_STALE else "send"
+            if action == "drop":
+                dropped += 1
+            else:
+                t = REPLIES.get(detect_lang(text), REPLIES["tr"])
+                message = t["reminder_due"].format(text=text)
+                if action == "late":
+                    message += "\n\n" + t["reminder_late"].format(minutes=int(lag.total_seconds() // 60))
+                await wait_send_budget()
+                attempts += 1
+                try:
+                    await bot.send_message(chat_id, message, request_timeout=HTTP_BULK_TIMEOUT)
+                except TelegramForbiddenError:
+                    await db.remove_user(pool, chat_id)
+                    done_ids.append(reminder_id)
+                    continue
+                except Exception:
+                    logger.exception("Failed to send reminder %s", reminder_id)
+                    if lag <= CATCHUP_STALE:
+                        # Retried on the next tick while it is still live.
+                        continue
+                    # Past the staleness window it is given up like a dropped one, so it
+                    # cannot hold the head of the backlog (and the lag metric) forever.
+                    given_up += 1
+            if recur:
+                user_tz = ZoneInfo(tz_name or TZ_NAME)
+                rescheduled.append((reminder_id, next_occurrence(remind_at, recur, user_tz, now)))
+            else:
+                done_ids.append(reminder_id)
 
-async def check_reminders(bot: Bot, pool: asyncpg.Pool) -> None:
-    now = datetime.now(TZ)
-    due = await fetch_due_reminders(pool, now)
-    if not due:
-        return
+        await db.mark_reminders_sent(pool, done_ids, now)
+        await db.reschedule_reminders(pool, rescheduled)
+        if len(page) < CATCHUP_BATCH_SIZE:
+            break
 
-    sent_ids = []
-    for reminder_id, chat_id, text in due:
-        lang = detect_lang(text)
-        message = REPLIES.get(lang, REPLIES["tr"])["reminder_due"].format(text=text)
-        try:
-            await bot.send_message(chat_id, message)
-            sent_ids.append(reminder_id)
-        except TelegramForbiddenError:
-            await remove_user(pool, chat_id)
-            sent_ids.append(reminder_id)
-        except Exception:
-            logger.exception("Failed to send reminder %s", reminder_id)
+    if dropped:
+        logger.info("Dropped %s stale reminders", dropped)
+    if given_up:
+        logger.warning("Gave up on %s stale reminders that failed to send", given_up)
+    return attempts
 
-    await mark_reminders_sent(pool, sent_ids, now)
 
+async def check_reminders(bot: Bot, pool: db.Pool) -> None:
+    now = datetime.now(timezone.utc)
+    if not await db.fetch_due_reminders(pool, now, limit=1):
+        METRICS["catchup_lag_seconds"] = 0.0
+        return
 
-async def send_water_reminder(bot: Bot, pool: asyncpg.Pool) -> int:
-    users = await list_users(pool)
-    sent_count = 0
-    for chat_id, lang in users:
-        message = REPLIES.get(lang, REPLIES["tr"])["water_reminder"]
-        try:
-            await bot.send_message(chat_id, message)
-            sent_count += 1
-        except TelegramForbiddenError:
-            await remove_user(pool, chat_id)
-        except Exception:
-            logger.exception("Failed to send water reminder to %s", chat_id)
-    return sent_count
-
+    stale_before = now - CATCHUP_STALE
+    # Live reminders (due inside the staleness window) go first. A cursor of (stale_before, 0)
+    # starts the keyset scan right at the window, since reminder ids start at 1.
+    used = await process_due_reminders(bot, pool, now, (stale_before, 0), now, REMINDER_TICK_BUDGET)
+    # Backlog left over from downtime gets the rest of the budget, oldest first, and
+    # continues on the next tick.
+    await process_due_reminders(bot, pool, stale_before, None, now, REMINDER_TICK_BUDGET - used)
 
-async def send_eat_reminder(bot: Bot, pool: asyncpg.Pool) -> int:
-    users = await list_users(pool)
-    sent_count = 0
-    for chat_id, lang in users:
-        message = REPLIES.get(lang, REPLIES["tr"])["eat_reminder"]
-        try:
-            await bot.send_message(chat_id, message)
-            sent_count += 1
-        except TelegramForbiddenError:
-            await remove_user(pool, chat_id)
-        except Exception:
-            logger.exception("Failed to send eat reminder to %s", chat_id)
-    return sent_count
+    # Measured after the passes, so the metric shows what is still pending.
+    oldest = await db.fetch_due_reminders(pool, now, limit=1)
+    METRICS["catchup_lag_seconds"] = (now - oldest[0][3]).total_seconds() if oldest else 0.0
+    if METRICS["catchup_lag_seconds"] > CATCHUP_STALE.total_seconds():
+        logger.info("Reminder catch-up lag: %.0fs", METRICS["catchup_lag_seconds"])
 
 
-async def send_love_reminder(bot: Bot, pool: asyncpg.Pool) -> int:
-    users = await list_users(pool)
+async def send_text_broadcast(bot: Bot, pool: db.Pool, reply_key: str, users: list) -> int:
     sent_count = 0
     for chat_id, lang in users:
-        message = REPLIES.get(lang, REPLIES["tr"])["love_reminder"]
+        message = REPLIES.get(lang, REPLIES["tr"])[reply_key]
+        await wait_send_budget()
         try:
-            await bot.send_message(chat_id, message)
+            await bot.send_message(chat_id, message, request_timeout=HTTP_BULK_TIMEOUT)
             sent_count += 1
         except TelegramForbiddenError:
-            await remove_user(pool, chat_id)
+            await db.remove_user(pool, chat_id)
         except Exception:
-            logger.exception("Failed to send love reminder to %s", chat_id)
+            logger.exception("Failed to send %s to %s", reply_key, chat_id)
     return sent_count
 
 
-async def send_apology_reminder(bot: Bot, pool: asyncpg.Pool) -> int:
-    users = await list_users(pool)
-    sent_count = 0
-    for chat_id, lang in users:
-        message = REPLIES.get(lang, REPLIES["tr"])["apology_reminder"]
-        try:
-            await bot.send_message(chat_id, message)
-            sent_count += 1
-        except TelegramForbiddenError:
-            await remove_user(pool, chat_id)
-        except Exception:
-            logger.exception("Failed to send apology reminder to %s", chat_id)
-    return sent_count
-
-
-async def send_quiz(bot: Bot, pool: asyncpg.Pool) -> None:
-    users = await list_users(pool)
+async def send_quiz(bot: Bot, pool: db.Pool, users: list) -> None:
     quiz = build_quiz()
     if not quiz:
         return
@@ -313,66 +462,186 @@ async def send_quiz(bot: Bot, pool: asyncpg.Pool) -> None:
         message = t["quiz_intro"] + "\n\n" + t["quiz_question"].format(
             word=word, a=options[0], b=options[1], c=options[2]
         )
+        await wait_send_budget()
         try:
-            await bot.send_message(chat_id, message)
-            await set_quiz_state(pool, chat_id, correct_letter)
+            await bot.send_message(chat_id, message, request_timeout=HTTP_BULK_TIMEOUT)
+            await db.set_quiz_state(pool, chat_id, correct_letter)
         except TelegramForbiddenError:
-            await remove_user(pool, chat_id)
+            await db.remove_user(pool, chat_id)
         except Exception:
             logger.exception("Failed to send quiz to %s", chat_id)
 
 
-def _passed_time(now: datetime, hour: int, minute: int) -> bool:
-    return (now.hour, now.minute) >= (hour, minute)
+def broadcast_state_key(slot_key: str, tz_name: str) -> str:
+    # Default-timezone buckets keep the bare slot key used before per-user timezones.
+    return slot_key if tz_name == TZ_NAME else f"{slot_key}@{tz_name}"
 
 
-async def run_scheduled_broadcasts(bot: Bot, pool: asyncpg.Pool) -> None:
-    now = datetime.now(TZ)
-    today = now.date()
+def next_fire_time(slot: dict, last_date, now: datetime) -> datetime:
+    fire_at = datetime.combine(now.date(), time(slot["hour"], slot["minute"]), tzinfo=now.tzinfo)
+    if last_date is not None and last_date >= now.date():
+        fire_at += timedelta(days=1)
+    return fire_at
 
-    if _passed_time(now, DAILY_HOUR, DAILY_MINUTE):
-        await send_daily_words(bot, pool)
 
-    last_apology_date, last_eat_date, last_love_date, last_water_date, last_quiz_date = await get_schedule_state(pool)
+def register_user_timezone(tz_name: str) -> None:
+    if tz_name not in USER_TIMEZONES:
+        USER_TIMEZONES.add(tz_name)
+        BROADCAST_WAKEUP.set()
 
-    if _passed_time(now, 1, 17) and last_apology_date != today:
-        apology_sent = await send_apology_reminder(bot, pool)
-        if apology_sent > 0:
-            await update_last_apology_date(pool, today)
 
-    if _passed_time(now, 12, 15) and last_eat_date != today:
-        eat_sent = await send_eat_reminder(bot, pool)
-        if eat_sent > 0:
-            await update_last_eat_date(pool, today)
+async def settle_new_timezone(pool: db.Pool, state: dict, tz_name: str, now: datetime) -> None:
+    # A new zone should not replay the slots that already passed there today. The dates are
+    # persisted too, otherwise a restart would see the zone without state and fire them all.
+    local_now = now.astimezone(ZoneInfo(tz_name))
+    keys = []
+    for slot in BROADCASTS:
+        key = broadcast_state_key(slot["key"], tz_name)
+        if key not in state and next_fire_time(slot, None, local_now) <= local_now:
+            keys.append(key)
+    await db.set_broadcast_dates(pool, keys, local_now.date())
+    for key in keys:
+        state[key] = local_now.date()
 
-    if _passed_time(now, 14, 50) and last_love_date != today:
-        love_sent = await send_love_reminder(bot, pool)
-        if love_sent > 0:
-            await update_last_love_date(pool, today)
 
-    if _passed_time(now, 15, 0) and last_water_date != today:
-        water_sent = await send_water_reminder(bot, pool)
-        if water_sent > 0:
-            await update_last_water_date(pool, today)
+async def run_broadcast(bot: Bot, pool: db.Pool, slot: dict, users: list, day) -> bool:
+    kind = slot.get("kind", "text")
+    if kind == "words":
+        await send_daily_words(bot, pool, users, day)
+        return True
+    if kind == "quiz":
+        await send_quiz(bot, pool, users)
+        return True
+    return await send_text_broadcast(bot, pool, slot["reply"], users) > 0
 
-    if _passed_time(now, 15, 2) and last_quiz_date != today:
-        await send_quiz(bot, pool)
-        await update_last_quiz_date(pool, today)
 
-
-async def on_startup(bot: Bot, pool: asyncpg.Pool) -> None:
-    await init_db(pool)
+async def run_scheduled_broadcasts(bot: Bot, pool: db.Pool) -> None:
+    # Long-lived task: a DB error (e.g. while loading state at startup) must not end it for good.
+    delay = BROADCAST_RETRY_SECONDS
+    while True:
+        try:
+            state, known_timezones = await load_broadcast_state(pool)
+            # Loading worked, so an earlier failure has cleared: later ones start over at the
+            # short delay.
+            delay = BROADCAST_RETRY_SECONDS
+            await broadcast_loop(bot, pool, state, known_timezones)
+        except Exception:
+            logger.exception("Broadcast loop failed, restarting in %ss", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, BROADCAST_MAX_SLEEP_SECONDS)
+
+
+async def load_broadcast_state(pool: db.Pool) -> tuple[dict, set[str]]:
+    state = await db.get_broadcast_state(pool)
+    USER_TIMEZONES.update(tz_name or TZ_NAME for tz_name in await db.list_user_timezones(pool))
+    # Zones without any state rows yet are left out, so the loop sets them up exactly like
+    # zones first seen at runtime.
+    known_timezones = {
+        tz_name
+        for tz_name in USER_TIMEZONES
+        if any(broadcast_state_key(slot["key"], tz_name) in state for slot in BROADCASTS)
+    }
+    return state, known_timezones
+
+
+async def broadcast_loop(bot: Bot, pool: db.Pool, state: dict, known_timezones: set[str]) -> None:
+    # Slot dates live in memory; the DB is only touched when a bucket fires or a zone is new.
+    retry_at: dict[str, datetime] = {}
+    while True:
+        now = datetime.now(timezone.utc)
+
+        for tz_name in USER_TIMEZONES - known_timezones:
+            await settle_new_timezone(pool, state, tz_name, now)
+            known_timezones.add(tz_name)
+
+        # Group due (slot, timezone) pairs by their UTC fire instant.
+        buckets: dict[tuple[datetime, str], tuple[dict, list[str]]] = {}
+        wake_at = now + timedelta(seconds=BROADCAST_MAX_SLEEP_SECONDS)
+        for slot in BROADCASTS:
+            for tz_name in sorted(known_timezones):
+                key = broadcast_state_key(slot["key"], tz_name)
+                local_now = now.astimezone(ZoneInfo(tz_name))
+                fire_at = max(next_fire_time(slot, state.get(key), local_now), retry_at.get(key, now))
+                if fire_at > now:
+                    wake_at = min(wake_at, fire_at)
+                    continue
+                bucket = (fire_at.astimezone(timezone.utc), slot["key"])
+                buckets.setdefault(bucket, (slot, []))[1].append(tz_name)
+
+        if not buckets:
+            try:
+                await asyncio.wait_for(BROADCAST_WAKEUP.wait(), max((wake_at - now).total_seconds(), 1))
+            except asyncio.TimeoutError:
+                pass
+            BROADCAST_WAKEUP.clear()
+            continue
+
+        for (fire_at, slot_key), (slot, tz_names) in sorted(buckets.items(), key=lambda item: item[0]):
+            keys = [broadcast_state_key(slot_key, tz_name) for tz_name in tz_names]
+            # Every zone in a bucket shares the UTC offset at fire_at, hence the local date.
+            day = fire_at.astimezone(ZoneInfo(tz_names[0])).date()
+            try:
+                if CATCHUP_POLICY == "drop" and now - fire_at > CATCHUP_STALE:
+                    logger.info("Dropping stale broadcast %s for %s", slot_key, ", ".join(tz_names))
+                    done = True
+                else:
+                    users = await db.list_users_in_timezones(pool, tz_names, TZ_NAME in tz_names)
+                    # Nobody left in these zones (e.g. everyone moved with /timezone): nothing to
+                    # retry, so close the day instead of polling the DB every minute.
+                    done = not users or await run_broadcast(bot, pool, slot, users, day)
+                if done:
+                    await db.set_broadcast_dates(pool, keys, day)
+                    for key in keys:
+                        state[key] = day
+                        retry_at.pop(key, None)
+                    continue
+            except Exception:
+                logger.exception("Broadcast %s failed for %s", slot_key, ", ".join(tz_names))
+            for key in keys:
+                retry_at[key] = datetime.now(timezone.utc) + timedelta(seconds=BROADCAST_RETRY_SECONDS)
+
+
+async def on_startup(bot: Bot, pool: db.Pool) -> None:
+    await db.init_db(pool)
     logger.info("DB initialized")
 
 
-async def handle_start(message: Message, pool: asyncpg.Pool) -> None:
+async def handle_start(message: Message, pool: db.Pool) -> None:
     lang = detect_lang(message.text or "")
-    await add_user(pool, message.chat.id, lang)
-    await update_user_lang(pool, message.chat.id, lang)
+    await db.add_user(pool, message.chat.id, lang)
+    await db.update_user_lang(pool, message.chat.id, lang)
     await message.answer(REPLIES.get(lang, REPLIES["tr"])["start"])
 
 
-async def handle_message(message: Message, bot: Bot, pool: asyncpg.Pool) -> None:
+async def get_user_zone(pool: db.Pool, chat_id: int) -> ZoneInfo:
+    return ZoneInfo(await db.get_user_tz(pool, chat_id) or TZ_NAME)
+
+
+async def handle_timezone(message: Message, pool: db.Pool) -> None:
+    text = message.text or ""
+    lang = detect_lang(text)
+    await db.add_user(pool, message.chat.id, lang)
+    await db.update_user_lang(pool, message.chat.id, lang)
+    t = REPLIES.get(lang, REPLIES["tr"])
+
+    parts = text.split(maxsplit=1)
+    if len(parts) < 2:
+        current = await db.get_user_tz(pool, message.chat.id) or TZ_NAME
+        await message.answer(t["timezone_current"].format(tz=current))
+        return
+
+    tz_name = parts[1].strip()
+    try:
+        ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        await message.answer(t["timezone_invalid"])
+        return
+    await db.update_user_tz(pool, message.chat.id, tz_name)
+    register_user_timezone(tz_name)
+    await message.answer(t["timezone_set"].format(tz=tz_name))
+
+
+async def handle_message(message: Message, bot: Bot, pool: db.Pool) -> None:
     text = (message.text or "").strip()
     if not text:
         return
@@ -383,11 +652,11 @@ async def handle_message(message: Message, bot: Bot, pool: asyncpg.Pool) -> None
         return
 
     lang = detect_lang(text)
-    await add_user(pool, message.chat.id, lang)
-    await update_user_lang(pool, message.chat.id, lang)
+    await db.add_user(pool, message.chat.id, lang)
+    await db.update_user_lang(pool, message.chat.id, lang)
 
     if text.strip().upper() in {"A", "B", "C"}:
-        state = await get_quiz_state(pool, message.chat.id)
+        state = await db.get_quiz_state(pool, message.chat.id)
         if state:
             correct_letter, _ = state
             t = REPLIES.get(lang, REPLIES["tr"])
@@ -395,7 +664,7 @@ async def handle_message(message: Message, bot: Bot, pool: asyncpg.Pool) -> None
                 await message.answer(t["quiz_correct"])
             else:
                 await message.answer(t["quiz_wrong"].format(answer=correct_letter))
-            await clear_quiz_state(pool, message.chat.id)
+            await db.clear_quiz_state(pool, message.chat.id)
             return
 
     lowered = text.lower()
@@ -405,6 +674,8 @@ async def handle_message(message: Message, bot: Bot, pool: asyncpg.Pool) -> None
         return
 
     lowered = text.lower()
+    recurrence = parse_recurrence(text)
+    # Only the verb asks for a reminder: "каждый день" alone is part of an ordinary sentence.
     wants_reminder = ("hatırlat" in lowered) or ("напомн" in lowered)
     t = parse_time_from_text(text)
     if not t:
@@ -414,33 +685,149 @@ async def handle_message(message: Message, bot: Bot, pool: asyncpg.Pool) -> None
             )
         return
 
-    now = datetime.now(TZ)
-    remind_at = datetime.combine(now.date(), t, tzinfo=TZ)
-    if remind_at <= now:
+    user_tz = await get_user_zone(pool, message.chat.id)
+    now = datetime.now(user_tz)
+    remind_at = datetime.combine(now.date(), t, tzinfo=user_tz)
+    if recurrence and recurrence[1] is not None:
+        remind_at = remind_at + timedelta(days=(recurrence[1] - now.weekday()) % 7)
+        if remind_at <= now:
+            remind_at = remind_at + timedelta(days=7)
+    elif remind_at <= now:
         remind_at = remind_at + timedelta(days=1)
 
-    if wants_reminder:
-        await add_reminder(pool, message.chat.id, remind_at, text)
+    if not wants_reminder:
+        return
+    replies = REPLIES.get(lang, REPLIES["tr"])
+    if recurrence:
+        rule = recurrence[0]
+        await db.add_reminder(pool, message.chat.id, remind_at, text, recur=rule)
         await message.answer(
-            REPLIES.get(lang, REPLIES["tr"])["reminder_set"].format(time=t.strftime("%H:%M"))
+            replies["reminder_set_recurring"].format(
+                time=t.strftime("%H:%M"), rule=replies[f"recur_{rule}"]
+            )
         )
+    else:
+        await db.add_reminder(pool, message.chat.id, remind_at, text)
+        await message.answer(replies["reminder_set"].format(time=t.strftime("%H:%M")))
+
+
+def encode_reminder_cursor(item) -> str:
+    reminder_id, remind_at = item[0], item[1]
+    micros = (remind_at - EPOCH) // timedelta(microseconds=1)
+    return f"{micros}:{reminder_id}"
+
+
+def decode_reminder_cursor(raw: str):
+    micros, reminder_id = raw.split(":")
+    return EPOCH + timedelta(microseconds=int(micros)), int(reminder_id)
 
 
-async def handle_reminders(message: Message, pool: asyncpg.Pool) -> None:
+async def load_reminders_page(pool: db.Pool, chat_id: int, cursor=None, direction: str = "next"):
+    items = await db.list_pending_reminders(pool, chat_id, REMINDERS_PAGE_SIZE + 1, cursor, direction)
+    has_more = len(items) > REMINDERS_PAGE_SIZE
+    items = items[-REMINDERS_PAGE_SIZE:] if direction == "prev" else items[:REMINDERS_PAGE_SIZE]
+    if not items:
+        if cursor is not None:
+            # The page emptied out (cancelled or fired), start over from the first page.
+            return await load_reminders_page(pool, chat_id)
+        return items, False, False
+
+    # The opposite side only needs a one-row probe past the edge of this page.
+    if direction == "prev":
+        has_prev = has_more
+        has_next = bool(await db.list_pending_reminders(pool, chat_id, 1, (items[-1][1], items[-1][0]), "next"))
+    else:
+        has_next = has_more
+        has_prev = cursor is not None and bool(
+            await db.list_pending_reminders(pool, chat_id, 1, (items[0][1], items[0][0]), "prev")
+        )
+    return items, has_prev, has_next
+
+
+def build_reminders_page(replies: dict, items: list, user_tz: ZoneInfo, has_prev: bool, has_next: bool):
+    lines = [replies["reminders_title"]]
+    for reminder_id, remind_at, text, recur in items:
+        local_time = remind_at.astimezone(user_tz).strftime("%Y-%m-%d %H:%M")
+        rule = f" ({replies[f'recur_{recur}']})" if recur else ""
+        lines.append(f"- #{reminder_id} {local_time}{rule} — {text}")
+
+    kb = InlineKeyboardBuilder()
+    first = encode_reminder_cursor(items[0])
+    for reminder_id, *_ in items:
+        kb.button(text=f"❌ #{reminder_id}", callback_data=f"rem:del:{reminder_id}:{first}")
+    nav = 0
+    if has_prev:
+        kb.button(text="◀️ Prev", callback_data=f"rem:prev:{first}")
+        nav += 1
+    if has_next:
+        kb.button(text="Next ▶️", callback_data=f"rem:next:{encode_reminder_cursor(items[-1])}")
+        nav += 1
+    sizes = [5] * (len(items) // 5) + ([len(items) % 5] if len(items) % 5 else [])
+    kb.adjust(*sizes, *([nav] if nav else []))
+    return "\n".join(lines), kb.as_markup()
+
+
+async def handle_reminders(message: Message, pool: db.Pool) -> None:
     lang = detect_lang(message.text or "")
-    await add_user(pool, message.chat.id, lang)
-    await update_user_lang(pool, message.chat.id, lang)
+    await db.add_user(pool, message.chat.id, lang)
+    await db.update_user_lang(pool, message.chat.id, lang)
 
-    items = await list_pending_reminders(pool, message.chat.id, limit=20)
+    replies = REPLIES.get(lang, REPLIES["tr"])
+    items, has_prev, has_next = await load_reminders_page(pool, message.chat.id)
     if not items:
-        await message.answer(REPLIES.get(lang, REPLIES["tr"])["reminders_empty"])
+        await message.answer(replies["reminders_empty"])
         return
 
-    lines = [REPLIES.get(lang, REPLIES["tr"])["reminders_title"]]
-    for reminder_id, remind_at, text in items:
-        local_time = remind_at.astimezone(TZ).strftime("%Y-%m-%d %H:%M")
-        lines.append(f"- #{reminder_id} {local_time} — {text}")
-    await message.answer("\n".join(lines))
+    user_tz = await get_user_zone(pool, message.chat.id)
+    text, markup = build_reminders_page(replies, items, user_tz, has_prev, has_next)
+    await message.answer(text, reply_markup=markup)
+
+
+def parse_reminders_callback(data: str):
+    # "rem:next:<cursor>", "rem:prev:<cursor>" or "rem:del:<id>:<cursor>"; None if malformed.
+    parts = (data or "").split(":")
+    try:
+        if len(parts) == 4 and parts[1] in ("next", "prev"):
+            return parts[1], None, decode_reminder_cursor(f"{parts[2]}:{parts[3]}")
+        if len(parts) == 5 and parts[1] == "del":
+            return "del", int(parts[2]), decode_reminder_cursor(f"{parts[3]}:{parts[4]}")
+    except (ValueError, OverflowError):
+        return None
+    return None
+
+
+async def handle_reminders_page(callback: CallbackQuery, pool: db.Pool) -> None:
+    parsed = parse_reminders_callback(callback.data)
+    if parsed is None or not isinstance(callback.message, Message):
+        # Malformed payload, or the listing is too old for Telegram to hand it back.
+        await callback.answer()
+        return
+
+    chat_id = callback.message.chat.id
+    replies = REPLIES.get(await db.get_user_lang(pool, chat_id) or "tr", REPLIES["tr"])
+    action, reminder_id, cursor = parsed
+
+    notice = None
+    direction = action
+    if action == "del":
+        cancelled = await db.cancel_reminder(pool, chat_id, reminder_id)
+        notice = replies["reminder_cancelled" if cancelled else "reminder_missing"]
+        direction = "from"
+
+    items, has_prev, has_next = await load_reminders_page(pool, chat_id, cursor, direction)
+    try:
+        if not items:
+            await callback.message.edit_text(replies["reminders_empty"])
+        else:
+            user_tz = await get_user_zone(pool, chat_id)
+            text, markup = build_reminders_page(replies, items, user_tz, has_prev, has_next)
+            await callback.message.edit_text(text, reply_markup=markup)
+    except TelegramBadRequest as error:
+        # A double tap renders exactly what the first tap just wrote; the second ❌ has
+        # already been told "reminder_missing" above.
+        if "message is not modified" not in error.message:
+            raise
+    await callback.answer(notice)
 
 
 def build_song_message(song: dict) -> str:
@@ -459,65 +846,120 @@ def build_song_message(song: dict) -> str:
     return "\n".join(lines)
 
 
-def build_next_keyboard():
+def parse_song_filter(data: str):
+    parts = data.split(":")
+    if len(parts) != 3 or parts[1] not in ("g", "a") or not parts[2].isdigit():
+        return None
+    values = SONG_GENRES if parts[1] == "g" else SONG_ARTISTS
+    index = int(parts[2])
+    return (parts[1], index) if index < len(values) else None
+
+
+async def load_song_seen(pool: db.Pool, chat_id: int) -> None:
+    if chat_id in SONG_SEEN:
+        return
+    raw = await db.get_song_state(pool, chat_id)
+    # Mask off bits left over from a longer catalogue.
+    SONG_SEEN[chat_id] = int.from_bytes(raw, "little") & SONG_POOL_MASKS[None] if raw else 0
+
+
+def pick_song(chat_id: int, song_filter=None) -> dict:
+    seen = SONG_SEEN.get(chat_id, 0)
+    mask = SONG_POOL_MASKS[song_filter]
+    if not mask & ~seen:
+        # Every song in this pool was already shown: start a new round for it.
+        seen &= ~mask
+    unseen = [i for i in SONG_POOLS[song_filter] if not seen >> i & 1]
+    index = random.choice(unseen)
+    SONG_SEEN[chat_id] = seen | (1 << index)
+    SONG_SEEN_DIRTY.add(chat_id)
+    return SONGS[index]
+
+
+async def flush_song_state(pool: db.Pool) -> None:
+    if not SONG_SEEN_DIRTY:
+        return
+    chat_ids = list(SONG_SEEN_DIRTY)
+    SONG_SEEN_DIRTY.clear()
+    size = (len(SONGS) + 7) // 8
+    try:
+        await db.save_song_states(
+            pool, [(chat_id, SONG_SEEN[chat_id].to_bytes(size, "little")) for chat_id in chat_ids]
+        )
+    except Exception:
+        SONG_SEEN_DIRTY.update(chat_ids)
+        raise
+
+
+def build_next_keyboard(song: dict, song_filter=None):
     kb = InlineKeyboardBuilder()
-    kb.button(text="Next", callback_data="next_song")
+    next_data = f"next_song:{song_filter[0]}:{song_filter[1]}" if song_filter else "next_song"
+    kb.button(text="Next", callback_data=next_data)
+    for kind, field, values, icon in (("a", "artist", SONG_ARTISTS, "🎤"), ("g", "genre", SONG_GENRES, "🎵")):
+        value = song.get(field)
+        if value in values and song_filter != (kind, values.index(value)):
+            kb.button(text=f"{icon} {value}", callback_data=f"next_song:{kind}:{values.index(value)}")
+    if song_filter:
+        kb.button(text="🔀 All", callback_data="next_song")
+    kb.adjust(1, 2)
     return kb.as_markup()
 
 
-async def handle_song_suggestion(message: Message, pool: asyncpg.Pool) -> None:
+async def handle_song_suggestion(message: Message, pool: db.Pool) -> None:
     lang = detect_lang(message.text or "")
-    await add_user(pool, message.chat.id, lang)
-    await update_user_lang(pool, message.chat.id, lang)
+    await db.add_user(pool, message.chat.id, lang)
+    await db.update_user_lang(pool, message.chat.id, lang)
     if not SONGS:
         await message.answer("Şarkı listesi boş.")
         return
-    song = random.choice(SONGS)
-    await message.answer(build_song_message(song), reply_markup=build_next_keyboard())
+    await load_song_seen(pool, message.chat.id)
+    song = pick_song(message.chat.id)
+    await message.answer(build_song_message(song), reply_markup=build_next_keyboard(song))
 
 
-async def handle_send_love_now(message: Message, bot: Bot, pool: asyncpg.Pool) -> None:
+async def handle_send_love_now(message: Message, bot: Bot, pool: db.Pool) -> None:
     lang = detect_lang(message.text or "")
-    await add_user(pool, message.chat.id, lang)
-    await update_user_lang(pool, message.chat.id, lang)
-    sent = await send_love_reminder(bot, pool)
+    await db.add_user(pool, message.chat.id, lang)
+    await db.update_user_lang(pool, message.chat.id, lang)
+    sent = await send_text_broadcast(bot, pool, "love_reminder", await db.list_users(pool))
     await message.answer(f"Love bildirimi gönderildi. Alıcı sayısı: {sent}")
 
 
-async def handle_send_event_now(message: Message, bot: Bot, pool: asyncpg.Pool) -> None:
+async def handle_send_event_now(message: Message, bot: Bot, pool: db.Pool) -> None:
     lang = detect_lang(message.text or "")
-    await add_user(pool, message.chat.id, lang)
-    await update_user_lang(pool, message.chat.id, lang)
-    sent = await send_eat_reminder(bot, pool)
+    await db.add_user(pool, message.chat.id, lang)
+    await db.update_user_lang(pool, message.chat.id, lang)
+    sent = await send_text_broadcast(bot, pool, "eat_reminder", await db.list_users(pool))
     await message.answer(f"Event bildirimi gönderildi. Alıcı sayısı: {sent}")
 
 
-async def handle_debug_schedule(message: Message, pool: asyncpg.Pool) -> None:
-    now = datetime.now(TZ)
-    today = now.date()
-    last_apology_date, last_eat_date, last_love_date, last_water_date, last_quiz_date = await get_schedule_state(pool)
-    lines = [
-        f"now={now.strftime('%Y-%m-%d %H:%M:%S %Z')}",
-        f"last_apology_date={last_apology_date}",
-        f"last_eat_date={last_eat_date}",
-        f"last_love_date={last_love_date}",
-        f"last_water_date={last_water_date}",
-        f"last_quiz_date={last_quiz_date}",
-        f"due_01_17={_passed_time(now, 1, 17) and last_apology_date != today}",
-        f"due_12_15={_passed_time(now, 12, 15) and last_eat_date != today}",
-        f"due_14_50={_passed_time(now, 14, 50) and last_love_date != today}",
-        f"due_15_00={_passed_time(now, 15, 0) and last_water_date != today}",
-        f"due_15_02={_passed_time(now, 15, 2) and last_quiz_date != today}",
-    ]
+async def handle_debug_schedule(message: Message, pool: db.Pool) -> None:
+    now = datetime.now(timezone.utc)
+    state = await db.get_broadcast_state(pool)
+    tz_names = sorted({tz_name or TZ_NAME for tz_name in await db.list_user_timezones(pool)} | {TZ_NAME})
+    lines = [f"now={now.astimezone(TZ).strftime('%Y-%m-%d %H:%M:%S %Z')}"]
+    for tz_name in tz_names:
+        local_now = now.astimezone(ZoneInfo(tz_name))
+        lines.append(f"[{tz_name}]")
+        for slot in BROADCASTS:
+            last_date = state.get(broadcast_state_key(slot["key"], tz_name))
+            fire_at = next_fire_time(slot, last_date, local_now)
+            lines.append(
+                f"{slot['key']}: last_date={last_date} next={fire_at.strftime('%Y-%m-%d %H:%M')} due={fire_at <= local_now}"
+            )
     await message.answer("\n".join(lines))
 
 
-async def handle_next_song(callback: CallbackQuery) -> None:
+async def handle_next_song(callback: CallbackQuery, pool: db.Pool) -> None:
     if not SONGS:
         await callback.answer("Şarkı listesi boş.", show_alert=True)
         return
-    song = random.choice(SONGS)
-    await callback.message.edit_text(build_song_message(song), reply_markup=build_next_keyboard())
+    song_filter = parse_song_filter(callback.data)
+    await load_song_seen(pool, callback.message.chat.id)
+    song = pick_song(callback.message.chat.id, song_filter)
+    await callback.message.edit_text(
+        build_song_message(song), reply_markup=build_next_keyboard(song, song_filter)
+    )
     await callback.answer()
 
 
@@ -525,8 +967,12 @@ async def start_health_server() -> web.AppRunner:
     async def health(_):
         return web.Response(text="ok")
 
+    async def metrics(_):
+        return web.Response(text="".join(f"{name} {value}\n" for name, value in METRICS.items()))
+
     app = web.Application()
     app.router.add_get("/health", health)
+    app.router.add_get("/metrics", metrics)
 
     runner = web.AppRunner(app)
     await runner.setup()
@@ -543,11 +989,28 @@ async def handle_paused_callback(callback: CallbackQuery) -> None:
     await callback.answer("Bot geçici olarak durduruldu.", show_alert=True)
 
 
+def build_bot_session() -> TunedAiohttpSession:
+    # Interactive replies use the session default; broadcasts pass HTTP_BULK_TIMEOUT per request.
+    kwargs = {"timeout": HTTP_TIMEOUT}
+    if HTTP_FAST_JSON:
+        if orjson is None:
+            logger.warning("HTTP_FAST_JSON is set but orjson is not installed, using json")
+        else:
+            kwargs["json_dumps"] = lambda obj: orjson.dumps(obj).decode()
+            kwargs["json_loads"] = orjson.loads
+    return TunedAiohttpSession(
+        limit=HTTP_POOL_LIMIT,
+        keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+        ttl_dns_cache=HTTP_DNS_CACHE_SECONDS,
+        **kwargs,
+    )
+
+
 async def main() -> None:
-    bot = Bot(token=BOT_TOKEN)
+    bot = Bot(token=BOT_TOKEN, session=build_bot_session())
     dp = Dispatcher()
 
-    pool = await asyncpg.create_pool(DATABASE_URL, min_size=1, max_size=5)
+    pool = await db.create_pool(DATABASE_URL)
     await on_startup(bot, pool)
 
     async def start_handler(message: Message):
@@ -559,8 +1022,11 @@ async def main() -> None:
     async def song_handler(message: Message):
         await handle_song_suggestion(message, pool)
 
+    async def reminders_page_handler(callback: CallbackQuery):
+        await handle_reminders_page(callback, pool)
+
     async def next_song_handler(callback: CallbackQuery):
-        await handle_next_song(callback)
+        await handle_next_song(callback, pool)
 
     async def send_love_now_handler(message: Message):
         await handle_send_love_now(message, bot, pool)
@@ -568,12 +1034,17 @@ async def main() -> None:
     async def send_event_now_handler(message: Message):
         await handle_send_event_now(message, bot, pool)
 
+    async def timezone_handler(message: Message):
+        await handle_timezone(message, pool)
+
     async def debug_schedule_handler(message: Message):
         await handle_debug_schedule(message, pool)
 
     async def message_handler(message: Message):
         await handle_message(message, bot, pool)
 
+    scheduler = None
+    broadcasts_task = None
     if PAUSED_MODE:
         logger.info("Bot is running in paused mode")
         dp.message.register(handle_paused_message, F.text)
@@ -584,22 +1055,34 @@ async def main() -> None:
         dp.message.register(song_handler, Command("songsuggestion"))
         dp.message.register(send_love_now_handler, Command("sendlove"))
         dp.message.register(send_event_now_handler, Command("sendevent"))
+        dp.message.register(timezone_handler, Command("timezone"))
         dp.message.register(debug_schedule_handler, Command("debugschedule"))
-        dp.callback_query.register(next_song_handler, F.data == "next_song")
+        dp.callback_query.register(reminders_page_handler, F.data.startswith("rem:"))
+        dp.callback_query.register(next_song_handler, F.data.startswith("next_song"))
         dp.message.register(message_handler, F.text)
 
         scheduler = AsyncIOScheduler(timezone=TZ)
-        scheduler.add_job(run_scheduled_broadcasts, "interval", minutes=1, args=[bot, pool])
         scheduler.add_job(check_reminders, "interval", minutes=1, args=[bot, pool])
+        scheduler.add_job(flush_song_state, "interval", seconds=SONG_STATE_FLUSH_SECONDS, args=[pool])
         scheduler.start()
 
-        # Catch up immediately after startup if a scheduled minute was missed during sleep/restart.
-        await run_scheduled_broadcasts(bot, pool)
+        # Slots missed during sleep/restart are due immediately, so this also catches up.
+        broadcasts_task = asyncio.create_task(run_scheduled_broadcasts(bot, pool))
 
     await start_health_server()
 
     await dp.start_polling(bot)
 
+    # Stop everything that sends or writes before the pool goes away.
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
+    if broadcasts_task is not None:
+        broadcasts_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await broadcasts_task
+    await flush_song_state(pool)
+    await pool.close()
+
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,127 @@
+"""Compare aiogram's default AiohttpSession with TunedAiohttpSession against a local
+stub of the Bot API sendMessage method.
+
+    python benchmarks/bench_http_session.py --requests 2000 --concurrency 50 --bursts 3
+
+The stub answers every sendMessage after --delay-ms and counts the TCP connections the
+client opened, so the report shows both throughput and connection reuse. Use --gap to
+leave an idle pause between bursts longer than aiohttp's default 15 s keep-alive.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_session import TunedAiohttpSession  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+TOKEN = "42:stub"
+
+
+async def start_stub(delay: float, peers: set) -> web.AppRunner:
+    async def send_message(request: web.Request) -> web.Response:
+        peers.add(request.transport.get_extra_info("peername"))
+        form = await request.post()
+        if delay:
+            await asyncio.sleep(delay)
+        return web.json_response(
+            {
+                "ok": True,
+                "result": {
+                    "message_id": 1,
+                    "date": 0,
+                    "chat": {"id": int(form["chat_id"]), "type": "private"},
+                    "text": form["text"],
+                },
+            }
+        )
+
+    app = web.Application()
+    app.router.add_post(f"/bot{TOKEN}/sendMessage", send_message)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+
+async def run_case(name: str, session, args, port: int, peers: set) -> None:
+    bot = Bot(token=TOKEN, session=session)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def send(i: int) -> None:
+        async with semaphore:
+            await bot.send_message(i, "bench", request_timeout=args.timeout)
+
+    peers.clear()
+    rates = []
+    for burst in range(args.bursts):
+        if burst and args.gap:
+            await asyncio.sleep(args.gap)
+        started = time.perf_counter()
+        await asyncio.gather(*(send(i) for i in range(args.requests)))
+        rates.append(args.requests / (time.perf_counter() - started))
+    await bot.session.close()
+
+    per_burst = " ".join(f"{rate:.0f}" for rate in rates)
+    print(f"{name:<14} {len(peers):>5} connections   msg/s per burst: {per_burst}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="sends per burst")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--bursts", type=int, default=3)
+    parser.add_argument("--gap", type=float, default=0, help="idle seconds between bursts")
+    parser.add_argument("--delay-ms", type=float, default=2, help="stub latency per request")
+    parser.add_argument("--limit", type=int, default=100, help="tuned connector pool size")
+    parser.add_argument("--keepalive", type=float, default=60, help="tuned keep-alive seconds")
+    parser.add_argument("--timeout", type=int, default=60)
+    args = parser.parse_args()
+
+    peers: set = set()
+    runner = await start_stub(args.delay_ms / 1000, peers)
+    port = runner.addresses[0][1]
+    # "localhost" rather than the IP, so DNS caching is part of what gets measured.
+    api = TelegramAPIServer.from_base(f"http://localhost:{port}")
+
+    cases = [
+        ("default", AiohttpSession(api=api)),
+        ("tuned", TunedAiohttpSession(api=api, limit=args.limit, keepalive_timeout=args.keepalive)),
+    ]
+    if orjson is not None:
+        cases.append(
+            (
+                "tuned+orjson",
+                TunedAiohttpSession(
+                    api=api,
+                    limit=args.limit,
+                    keepalive_timeout=args.keepalive,
+                    json_dumps=lambda obj: orjson.dumps(obj).decode(),
+                    json_loads=orjson.loads,
+                ),
+            )
+        )
+
+    print(
+        f"{args.bursts} x {args.requests} sends, concurrency {args.concurrency}, "
+        f"stub delay {args.delay_ms} ms, idle gap {args.gap} s"
+    )
+    for name, session in cases:
+        await run_case(name, session, args, port, peers)
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
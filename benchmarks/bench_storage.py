@@ -0,0 +1,129 @@
+"""Compare the SQLite and Postgres storage backends on the bot's hot queries.
+
+    python benchmarks/bench_storage.py --users 2000 --reminders 20000 --concurrency 20
+
+SQLite always runs against a temporary file. Postgres runs when DATABASE_URL is a Postgres
+URL, inside a throwaway schema that is dropped afterwards.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_sqlite  # noqa: E402
+
+
+async def timed(name: str, count: int, concurrency: int, op) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            await op(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    elapsed = time.perf_counter() - started
+    print(f"  {name:<26} {count:>7} ops {count / elapsed:>10.0f} ops/s")
+
+
+async def workload(m, pool, args) -> None:
+    await m.init_db(pool)
+    now = datetime.now(timezone.utc)
+    zones = ["Europe/Istanbul", "Europe/Berlin", "Asia/Tokyo", None]
+    c = args.concurrency
+
+    async def add_user(i: int) -> None:
+        await m.add_user(pool, i)
+        if zones[i % len(zones)]:
+            await m.update_user_tz(pool, i, zones[i % len(zones)])
+
+    async def add_reminder(i: int) -> None:
+        # Half are already due, so the catch-up pages below have work to do.
+        at = now + timedelta(seconds=i - args.reminders // 2)
+        await m.add_reminder(pool, i % args.users, at, f"r{i}", "daily" if i % 10 == 0 else None)
+
+    async def page_reminders(i: int) -> None:
+        await m.list_pending_reminders(pool, i % args.users, limit=10)
+
+    async def quiz(i: int) -> None:
+        await m.set_quiz_state(pool, i % args.users, "A")
+        await m.get_quiz_state(pool, i % args.users)
+
+    await timed("add_user + tz", args.users, c, add_user)
+    await timed("add_reminder", args.reminders, c, add_reminder)
+    await timed("list_pending_reminders", args.users, c, page_reminders)
+    await timed(
+        "list_users_in_timezones", 200, c, lambda i: m.list_users_in_timezones(pool, zones[:3], True)
+    )
+    await timed("set + get quiz_state", args.users, c, quiz)
+
+    started = time.perf_counter()
+    drained = 0
+    cursor = None
+    while True:
+        rows = await m.fetch_due_reminders(pool, now, limit=args.batch, cursor=cursor)
+        if not rows:
+            break
+        cursor = (rows[-1][3], rows[-1][0])
+        await m.mark_reminders_sent(pool, [r[0] for r in rows if not r[4]], now)
+        await m.reschedule_reminders(pool, [(r[0], r[3] + timedelta(days=1)) for r in rows if r[4]])
+        drained += len(rows)
+    elapsed = time.perf_counter() - started
+    print(f"  {'catch-up drain':<26} {drained:>7} rows {drained / elapsed:>9.0f} rows/s")
+
+
+async def run_sqlite(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = await db_sqlite.create_pool(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        try:
+            print("sqlite")
+            await workload(db_sqlite, pool, args)
+        finally:
+            await pool.close()
+
+
+async def run_postgres(args, url: str) -> None:
+    import asyncpg
+
+    import db
+
+    schema = f"bench_{uuid.uuid4().hex[:12]}"
+    admin = await asyncpg.connect(url)
+    await admin.execute(f"CREATE SCHEMA {schema}")
+    pool = await asyncpg.create_pool(
+        url, min_size=1, max_size=5, server_settings={"search_path": schema}
+    )
+    try:
+        print("postgres")
+        await workload(db, pool, args)
+    finally:
+        await pool.close()
+        await admin.execute(f"DROP SCHEMA {schema} CASCADE")
+        await admin.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--reminders", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=500, help="fetch_due_reminders page size")
+    args = parser.parse_args()
+
+    print(f"{args.users} users, {args.reminders} reminders, concurrency {args.concurrency}")
+    await run_sqlite(args)
+    url = os.getenv("DATABASE_URL", "")
+    if url.startswith(("postgres://", "postgresql://")):
+        await run_postgres(args, url)
+    else:
+        print("postgres skipped: DATABASE_URL is not a Postgres URL")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,5 +1,6 @@
 import asyncpg
-from typing import List, Tuple
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
 
 CREATE_TABLES_SQL = """
 CREATE TABLE IF NOT EXISTS users (
@@ -21,6 +22,10 @@ CREATE INDEX IF NOT EXISTS idx_reminders_due
     ON reminders (remind_at)
     WHERE sent_at IS NULL;
 
+CREATE INDEX IF NOT EXISTS idx_reminders_chat_pending
+    ON reminders (chat_id, remind_at, id)
+    WHERE sent_at IS NULL;
+
 CREATE TABLE IF NOT EXISTS daily_state (
     id SMALLINT PRIMARY KEY DEFAULT 1,
     last_sent_date DATE,
@@ -32,6 +37,17 @@ CREATE TABLE IF NOT EXISTS daily_state (
     last_quiz_date DATE
 );
 
+CREATE TABLE IF NOT EXISTS broadcast_state (
+    key TEXT PRIMARY KEY,
+    last_date DATE
+);
+
+CREATE TABLE IF NOT EXISTS song_state (
+    chat_id BIGINT PRIMARY KEY,
+    seen BYTEA NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
 CREATE TABLE IF NOT EXISTS quiz_state (
     chat_id BIGINT PRIMARY KEY,
     correct_option CHAR(1) NOT NULL,
@@ -40,6 +56,14 @@ CREATE TABLE IF NOT EXISTS quiz_state (
 """
 
 ALTER_USERS_LANG_SQL = "ALTER TABLE users ADD COLUMN IF NOT EXISTS lang TEXT NOT NULL DEFAULT 'tr';"
+# NULL tz means the bot's default timezone.
+ALTER_USERS_TZ_SQL = """
+ALTER TABLE users ADD COLUMN IF NOT EXISTS tz TEXT;
+CREATE INDEX IF NOT EXISTS idx_users_tz ON users (tz);
+"""
+# recur is NULL for one-shot reminders, otherwise "daily" or "weekly". A recurring row is
+# re-armed in place with its next occurrence instead of being marked sent.
+ALTER_REMINDERS_RECUR_SQL = "ALTER TABLE reminders ADD COLUMN IF NOT EXISTS recur TEXT;"
 ALTER_DAILY_STATE_SQL = """
 ALTER TABLE daily_state ADD COLUMN IF NOT EXISTS last_apology_date DATE;
 ALTER TABLE daily_state ADD COLUMN IF NOT EXISTS last_eat_date DATE;
@@ -47,16 +71,41 @@ ALTER TABLE daily_state ADD COLUMN IF NOT EXISTS last_love_date DATE;
 ALTER TABLE daily_state ADD COLUMN IF NOT EXISTS last_water_date DATE;
 ALTER TABLE daily_state ADD COLUMN IF NOT EXISTS last_quiz_date DATE;
 """
+# Carry the per-column dates of the old hard-coded slots over to broadcast_state.
+MIGRATE_BROADCAST_STATE_SQL = """
+INSERT INTO broadcast_state (key, last_date)
+SELECT v.key, v.last_date FROM daily_state d,
+LATERAL (VALUES
+    ('daily_words', d.last_sent_date),
+    ('apology', d.last_apology_date),
+    ('eat', d.last_eat_date),
+    ('love', d.last_love_date),
+    ('water', d.last_water_date),
+    ('quiz', d.last_quiz_date)
+) AS v(key, last_date)
+WHERE d.id = 1 AND v.last_date IS NOT NULL
+ON CONFLICT (key) DO NOTHING;
+"""
+
+
+Pool = asyncpg.Pool
+
+
+async def create_pool(database_url: str) -> asyncpg.Pool:
+    return await asyncpg.create_pool(database_url, min_size=1, max_size=5)
 
 
 async def init_db(pool: asyncpg.Pool) -> None:
     async with pool.acquire() as conn:
         await conn.execute(CREATE_TABLES_SQL)
         await conn.execute(ALTER_USERS_LANG_SQL)
+        await conn.execute(ALTER_USERS_TZ_SQL)
+        await conn.execute(ALTER_REMINDERS_RECUR_SQL)
         await conn.execute(ALTER_DAILY_STATE_SQL)
         await conn.execute(
             "INSERT INTO daily_state (id) VALUES (1) ON CONFLICT (id) DO NOTHING"
         )
+        await conn.execute(MIGRATE_BROADCAST_STATE_SQL)
 
 
 async def add_user(pool: asyncpg.Pool, chat_id: int, lang: str = "tr") -> None:
@@ -79,6 +128,43 @@ async def list_users(pool: asyncpg.Pool) -> List[Tuple[int, str]]:
     return [(int(r["chat_id"]), str(r["lang"])) for r in rows]
 
 
+async def list_user_timezones(pool: asyncpg.Pool) -> List[Optional[str]]:
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("SELECT DISTINCT tz FROM users")
+    return [r["tz"] for r in rows]
+
+
+async def list_users_in_timezones(
+    pool: asyncpg.Pool, tz_names: List[str], include_default: bool = False
+) -> List[Tuple[int, str]]:
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            "SELECT chat_id, lang FROM users WHERE tz = ANY($1::text[]) OR ($2 AND tz IS NULL)",
+            tz_names,
+            include_default,
+        )
+    return [(int(r["chat_id"]), str(r["lang"])) for r in rows]
+
+
+async def get_user_tz(pool: asyncpg.Pool, chat_id: int) -> Optional[str]:
+    async with pool.acquire() as conn:
+        return await conn.fetchval("SELECT tz FROM users WHERE chat_id=$1", chat_id)
+
+
+async def update_user_tz(pool: asyncpg.Pool, chat_id: int, tz_name: str) -> None:
+    async with pool.acquire() as conn:
+        await conn.execute(
+            "UPDATE users SET tz=$1 WHERE chat_id=$2",
+            tz_name,
+            chat_id,
+        )
+
+
+async def get_user_lang(pool: asyncpg.Pool, chat_id: int) -> Optional[str]:
+    async with pool.acquire() as conn:
+        return await conn.fetchval("SELECT lang FROM users WHERE chat_id=$1", chat_id)
+
+
 async def update_user_lang(pool: asyncpg.Pool, chat_id: int, lang: str) -> None:
     async with pool.acquire() as conn:
         await conn.execute(
@@ -88,23 +174,40 @@ async def update_user_lang(pool: asyncpg.Pool, chat_id: int, lang: str) -> None:
         )
 
 
-async def add_reminder(pool: asyncpg.Pool, chat_id: int, remind_at, text: str) -> None:
+async def add_reminder(
+    pool: asyncpg.Pool, chat_id: int, remind_at, text: str, recur: Optional[str] = None
+) -> None:
     async with pool.acquire() as conn:
         await conn.execute(
-            "INSERT INTO reminders (chat_id, remind_at, text) VALUES ($1, $2, $3)",
+            "INSERT INTO reminders (chat_id, remind_at, text, recur) VALUES ($1, $2, $3, $4)",
             chat_id,
             remind_at,
             text,
+            recur,
         )
 
 
-async def fetch_due_reminders(pool: asyncpg.Pool, now) -> List[Tuple[int, int, str]]:
+async def fetch_due_reminders(pool: asyncpg.Pool, now, limit: Optional[int] = None, cursor=None):
+    # Ordered by (remind_at, id); cursor is the last (remind_at, id) already seen.
+    query = (
+        "SELECT r.id, r.chat_id, r.text, r.remind_at, r.recur, u.tz FROM reminders r "
+        "LEFT JOIN users u ON u.chat_id = r.chat_id "
+        "WHERE r.sent_at IS NULL AND r.remind_at <= $1"
+    )
+    args = [now]
+    if cursor is not None:
+        query += " AND (r.remind_at, r.id) > ($2, $3)"
+        args.extend(cursor)
+    query += " ORDER BY r.remind_at ASC, r.id ASC"
+    if limit is not None:
+        args.append(limit)
+        query += f" LIMIT ${len(args)}"
     async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT id, chat_id, text FROM reminders WHERE sent_at IS NULL AND remind_at <= $1",
-            now,
-        )
-    return [(int(r["id"]), int(r["chat_id"]), r["text"]) for r in rows]
+        rows = await conn.fetch(query, *args)
+    return [
+        (int(r["id"]), int(r["chat_id"]), r["text"], r["remind_at"], r["recur"], r["tz"])
+        for r in rows
+    ]
 
 
 async def mark_reminders_sent(pool: asyncpg.Pool, ids: List[int], sent_at) -> None:
@@ -118,88 +221,84 @@ async def mark_reminders_sent(pool: asyncpg.Pool, ids: List[int], sent_at) -> No
         )
 
 
-async def get_daily_state(pool: asyncpg.Pool):
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT last_sent_date, last_index FROM daily_state WHERE id=1"
-        )
-    return row["last_sent_date"], int(row["last_index"])
-
-
-async def update_daily_state(pool: asyncpg.Pool, last_sent_date, last_index: int) -> None:
+async def reschedule_reminders(pool: asyncpg.Pool, items: List[Tuple[int, datetime]]) -> None:
+    if not items:
+        return
     async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE daily_state SET last_sent_date=$1, last_index=$2 WHERE id=1",
-            last_sent_date,
-            last_index,
-        )
+        await conn.executemany("UPDATE reminders SET remind_at=$2 WHERE id=$1", items)
 
 
-async def get_schedule_state(pool: asyncpg.Pool):
+async def get_broadcast_state(pool: asyncpg.Pool) -> Dict[str, date]:
     async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT last_apology_date, last_eat_date, last_love_date, last_water_date, last_quiz_date FROM daily_state WHERE id=1"
-        )
-    return (
-        row["last_apology_date"],
-        row["last_eat_date"],
-        row["last_love_date"],
-        row["last_water_date"],
-        row["last_quiz_date"],
-    )
+        rows = await conn.fetch("SELECT key, last_date FROM broadcast_state")
+    return {str(r["key"]): r["last_date"] for r in rows}
 
 
-async def update_last_apology_date(pool: asyncpg.Pool, last_apology_date) -> None:
+async def set_broadcast_dates(pool: asyncpg.Pool, keys: List[str], last_date) -> None:
+    if not keys:
+        return
     async with pool.acquire() as conn:
         await conn.execute(
-            "UPDATE daily_state SET last_apology_date=$1 WHERE id=1",
-            last_apology_date,
+            "INSERT INTO broadcast_state (key, last_date) SELECT k, $2 FROM unnest($1::text[]) AS k "
+            "ON CONFLICT (key) DO UPDATE SET last_date=EXCLUDED.last_date",
+            keys,
+            last_date,
         )
 
 
-async def update_last_eat_date(pool: asyncpg.Pool, last_eat_date) -> None:
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE daily_state SET last_eat_date=$1 WHERE id=1",
-            last_eat_date,
+async def list_pending_reminders(
+    pool: asyncpg.Pool, chat_id: int, limit: int = 20, cursor=None, direction: str = "next"
+):
+    # Keyset pagination on (remind_at, id): "next" starts after the cursor row, "from" at it,
+    # "prev" ends before it. Rows always come back in ascending order.
+    if cursor is None:
+        query = (
+            "SELECT id, remind_at, text, recur FROM reminders "
+            "WHERE chat_id=$1 AND sent_at IS NULL "
+            "ORDER BY remind_at ASC, id ASC "
+            "LIMIT $2"
         )
-
-
-async def update_last_love_date(pool: asyncpg.Pool, last_love_date) -> None:
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE daily_state SET last_love_date=$1 WHERE id=1",
-            last_love_date,
+        args = (chat_id, limit)
+    else:
+        op, order = {"next": (">", "ASC"), "from": (">=", "ASC"), "prev": ("<", "DESC")}[direction]
+        query = (
+            "SELECT id, remind_at, text, recur FROM reminders "
+            f"WHERE chat_id=$1 AND sent_at IS NULL AND (remind_at, id) {op} ($3, $4) "
+            f"ORDER BY remind_at {order}, id {order} "
+            "LIMIT $2"
         )
+        args = (chat_id, limit, cursor[0], cursor[1])
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(query, *args)
+    if direction == "prev" and cursor is not None:
+        rows = list(reversed(rows))
+    return [(int(r["id"]), r["remind_at"], r["text"], r["recur"]) for r in rows]
 
 
-async def update_last_water_date(pool: asyncpg.Pool, last_water_date) -> None:
+async def cancel_reminder(pool: asyncpg.Pool, chat_id: int, reminder_id: int) -> bool:
     async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE daily_state SET last_water_date=$1 WHERE id=1",
-            last_water_date,
+        status = await conn.execute(
+            "DELETE FROM reminders WHERE id=$1 AND chat_id=$2 AND sent_at IS NULL",
+            reminder_id,
+            chat_id,
         )
+    return status == "DELETE 1"
 
 
-async def update_last_quiz_date(pool: asyncpg.Pool, last_quiz_date) -> None:
+async def get_song_state(pool: asyncpg.Pool, chat_id: int) -> Optional[bytes]:
     async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE daily_state SET last_quiz_date=$1 WHERE id=1",
-            last_quiz_date,
-        )
+        return await conn.fetchval("SELECT seen FROM song_state WHERE chat_id=$1", chat_id)
 
 
-async def list_pending_reminders(pool: asyncpg.Pool, chat_id: int, limit: int = 20):
+async def save_song_states(pool: asyncpg.Pool, items: List[Tuple[int, bytes]]) -> None:
+    if not items:
+        return
     async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT id, remind_at, text FROM reminders "
-            "WHERE chat_id=$1 AND sent_at IS NULL "
-            "ORDER BY remind_at ASC "
-            "LIMIT $2",
-            chat_id,
-            limit,
+        await conn.executemany(
+            "INSERT INTO song_state (chat_id, seen) VALUES ($1, $2) "
+            "ON CONFLICT (chat_id) DO UPDATE SET seen=EXCLUDED.seen, updated_at=NOW()",
+            items,
         )
-    return [(int(r["id"]), r["remind_at"], r["text"]) for r in rows]
 
 
 async def set_quiz_state(pool: asyncpg.Pool, chat_id: int, correct_option: str) -> None:
@@ -0,0 +1,393 @@
+import asyncio
+import concurrent.futures
+import queue
+import sqlite3
+import threading
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+# Embedded storage backend for single-node deployments. It implements the interface in
+# storage.STORAGE_FUNCTIONS like db.py does, taking a SQLitePool where db.py takes an
+# asyncpg pool.
+
+CREATE_TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS users (
+    chat_id INTEGER PRIMARY KEY,
+    lang TEXT NOT NULL DEFAULT 'tr',
+    tz TEXT,
+    first_seen TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_users_tz ON users (tz);
+
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id INTEGER NOT NULL,
+    remind_at TEXT NOT NULL,
+    text TEXT NOT NULL,
+    recur TEXT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    sent_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_reminders_due
+    ON reminders (remind_at)
+    WHERE sent_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_reminders_chat_pending
+    ON reminders (chat_id, remind_at, id)
+    WHERE sent_at IS NULL;
+
+CREATE TABLE IF NOT EXISTS broadcast_state (
+    key TEXT PRIMARY KEY,
+    last_date TEXT
+);
+
+CREATE TABLE IF NOT EXISTS song_state (
+    chat_id INTEGER PRIMARY KEY,
+    seen BLOB NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS quiz_state (
+    chat_id INTEGER PRIMARY KEY,
+    correct_option TEXT NOT NULL,
+    asked_at TEXT NOT NULL
+);
+"""
+
+READER_THREADS = 4
+WRITE_BATCH_SIZE = 200
+
+
+def _ts(value: datetime) -> str:
+    # Fixed-width UTC text, so string order is time order.
+    return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _dt(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _date(value: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(value) if value else None
+
+
+def _now() -> str:
+    return _ts(datetime.now(timezone.utc))
+
+
+# All writes go through one writer thread, which drains whatever is queued into a single
+# transaction (one SAVEPOINT per call, so a failing call does not abort the others). Reads
+# run on a small thread pool with one connection per thread; WAL lets them proceed while
+# the writer commits.
+class SQLitePool:
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._writes: queue.Queue = queue.Queue()
+        self._local = threading.local()
+        self._readers = concurrent.futures.ThreadPoolExecutor(
+            max_workers=READER_THREADS, thread_name_prefix="sqlite-reader"
+        )
+        self._writer = threading.Thread(target=self._run_writer, name="sqlite-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _run_writer(self) -> None:
+        conn = self._connect()
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            ops = [item for item in batch if item is not None]
+            if ops:
+                self._commit_batch(conn, ops)
+            if len(ops) != len(batch):
+                conn.close()
+                return
+
+    def _commit_batch(self, conn: sqlite3.Connection, ops: list) -> None:
+        # Calls whose awaiting task was cancelled before we got to them are skipped.
+        ops = [(fn, future) for fn, future in ops if future.set_running_or_notify_cancel()]
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, future in ops:
+                conn.execute("SAVEPOINT op")
+                try:
+                    results.append((future, fn(conn), None))
+                    conn.execute("RELEASE op")
+                except Exception as exc:
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    results.append((future, None, exc))
+            conn.execute("COMMIT")
+        except Exception as exc:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, future in ops:
+                future.set_exception(exc)
+            return
+        for future, result, exc in results:
+            if exc is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exc)
+
+    def _read(self, fn):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return fn(conn)
+
+    async def write(self, fn):
+        future = concurrent.futures.Future()
+        self._writes.put((fn, future))
+        return await asyncio.wrap_future(future)
+
+    async def read(self, fn):
+        return await asyncio.get_running_loop().run_in_executor(self._readers, self._read, fn)
+
+    async def execute(self, sql: str, *args) -> int:
+        return await self.write(lambda conn: conn.execute(sql, args).rowcount)
+
+    async def executemany(self, sql: str, rows) -> int:
+        return await self.write(lambda conn: conn.executemany(sql, rows).rowcount)
+
+    async def fetch(self, sql: str, *args) -> List[sqlite3.Row]:
+        return await self.read(lambda conn: conn.execute(sql, args).fetchall())
+
+    async def fetchrow(self, sql: str, *args) -> Optional[sqlite3.Row]:
+        return await self.read(lambda conn: conn.execute(sql, args).fetchone())
+
+    async def fetchval(self, sql: str, *args):
+        row = await self.fetchrow(sql, *args)
+        return row[0] if row is not None else None
+
+    async def close(self) -> None:
+        self._writes.put(None)
+        await asyncio.get_running_loop().run_in_executor(None, self._writer.join)
+        self._readers.shutdown(wait=False)
+
+
+Pool = SQLitePool
+
+
+async def create_pool(database_url: str) -> SQLitePool:
+    # sqlite:///relative/path.db or sqlite:////absolute/path.db
+    return SQLitePool(database_url[len("sqlite:///"):])
+
+
+async def init_db(pool: SQLitePool) -> None:
+    statements = [sql for sql in CREATE_TABLES_SQL.split(";") if sql.strip()]
+
+    def create(conn: sqlite3.Connection) -> None:
+        for sql in statements:
+            conn.execute(sql)
+
+    await pool.write(create)
+
+
+async def add_user(pool: SQLitePool, chat_id: int, lang: str = "tr") -> None:
+    await pool.execute(
+        "INSERT INTO users (chat_id, lang) VALUES (?, ?) ON CONFLICT (chat_id) DO NOTHING",
+        chat_id,
+        lang,
+    )
+
+
+async def remove_user(pool: SQLitePool, chat_id: int) -> None:
+    await pool.execute("DELETE FROM users WHERE chat_id=?", chat_id)
+
+
+async def list_users(pool: SQLitePool) -> List[Tuple[int, str]]:
+    rows = await pool.fetch("SELECT chat_id, lang FROM users")
+    return [(int(r["chat_id"]), str(r["lang"])) for r in rows]
+
+
+async def list_user_timezones(pool: SQLitePool) -> List[Optional[str]]:
+    rows = await pool.fetch("SELECT DISTINCT tz FROM users")
+    return [r["tz"] for r in rows]
+
+
+async def list_users_in_timezones(
+    pool: SQLitePool, tz_names: List[str], include_default: bool = False
+) -> List[Tuple[int, str]]:
+    placeholders = ", ".join("?" for _ in tz_names) or "NULL"
+    rows = await pool.fetch(
+        f"SELECT chat_id, lang FROM users WHERE tz IN ({placeholders}) OR (? AND tz IS NULL)",
+        *tz_names,
+        include_default,
+    )
+    return [(int(r["chat_id"]), str(r["lang"])) for r in rows]
+
+
+async def get_user_tz(pool: SQLitePool, chat_id: int) -> Optional[str]:
+    return await pool.fetchval("SELECT tz FROM users WHERE chat_id=?", chat_id)
+
+
+async def update_user_tz(pool: SQLitePool, chat_id: int, tz_name: str) -> None:
+    await pool.execute("UPDATE users SET tz=? WHERE chat_id=?", tz_name, chat_id)
+
+
+async def get_user_lang(pool: SQLitePool, chat_id: int) -> Optional[str]:
+    return await pool.fetchval("SELECT lang FROM users WHERE chat_id=?", chat_id)
+
+
+async def update_user_lang(pool: SQLitePool, chat_id: int, lang: str) -> None:
+    await pool.execute("UPDATE users SET lang=? WHERE chat_id=?", lang, chat_id)
+
+
+async def add_reminder(
+    pool: SQLitePool, chat_id: int, remind_at, text: str, recur: Optional[str] = None
+) -> None:
+    await pool.execute(
+        "INSERT INTO reminders (chat_id, remind_at, text, recur) VALUES (?, ?, ?, ?)",
+        chat_id,
+        _ts(remind_at),
+        text,
+        recur,
+    )
+
+
+async def fetch_due_reminders(pool: SQLitePool, now, limit: Optional[int] = None, cursor=None):
+    query = (
+        "SELECT r.id, r.chat_id, r.text, r.remind_at, r.recur, u.tz FROM reminders r "
+        "LEFT JOIN users u ON u.chat_id = r.chat_id "
+        "WHERE r.sent_at IS NULL AND r.remind_at <= ?"
+    )
+    args = [_ts(now)]
+    if cursor is not None:
+        query += " AND (r.remind_at, r.id) > (?, ?)"
+        args.extend([_ts(cursor[0]), cursor[1]])
+    query += " ORDER BY r.remind_at ASC, r.id ASC"
+    if limit is not None:
+        query += " LIMIT ?"
+        args.append(limit)
+    rows = await pool.fetch(query, *args)
+    return [
+        (int(r["id"]), int(r["chat_id"]), r["text"], _dt(r["remind_at"]), r["recur"], r["tz"])
+        for r in rows
+    ]
+
+
+async def mark_reminders_sent(pool: SQLitePool, ids: List[int], sent_at) -> None:
+    if not ids:
+        return
+    await pool.executemany(
+        "UPDATE reminders SET sent_at=? WHERE id=?",
+        [(_ts(sent_at), reminder_id) for reminder_id in ids],
+    )
+
+
+async def reschedule_reminders(pool: SQLitePool, items: List[Tuple[int, datetime]]) -> None:
+    if not items:
+        return
+    await pool.executemany(
+        "UPDATE reminders SET remind_at=? WHERE id=?",
+        [(_ts(remind_at), reminder_id) for reminder_id, remind_at in items],
+    )
+
+
+async def get_broadcast_state(pool: SQLitePool) -> Dict[str, date]:
+    rows = await pool.fetch("SELECT key, last_date FROM broadcast_state")
+    return {str(r["key"]): _date(r["last_date"]) for r in rows}
+
+
+async def set_broadcast_dates(pool: SQLitePool, keys: List[str], last_date) -> None:
+    if not keys:
+        return
+    await pool.executemany(
+        "INSERT INTO broadcast_state (key, last_date) VALUES (?, ?) "
+        "ON CONFLICT (key) DO UPDATE SET last_date=excluded.last_date",
+        [(key, last_date.isoformat()) for key in keys],
+    )
+
+
+async def list_pending_reminders(
+    pool: SQLitePool, chat_id: int, limit: int = 20, cursor=None, direction: str = "next"
+):
+    # Same keyset pagination as db.list_pending_reminders.
+    if cursor is None:
+        rows = await pool.fetch(
+            "SELECT id, remind_at, text, recur FROM reminders "
+            "WHERE chat_id=? AND sent_at IS NULL "
+            "ORDER BY remind_at ASC, id ASC "
+            "LIMIT ?",
+            chat_id,
+            limit,
+        )
+    else:
+        op, order = {"next": (">", "ASC"), "from": (">=", "ASC"), "prev": ("<", "DESC")}[direction]
+        rows = await pool.fetch(
+            "SELECT id, remind_at, text, recur FROM reminders "
+            f"WHERE chat_id=? AND sent_at IS NULL AND (remind_at, id) {op} (?, ?) "
+            f"ORDER BY remind_at {order}, id {order} "
+            "LIMIT ?",
+            chat_id,
+            _ts(cursor[0]),
+            cursor[1],
+            limit,
+        )
+        if direction == "prev":
+            rows = list(reversed(rows))
+    return [(int(r["id"]), _dt(r["remind_at"]), r["text"], r["recur"]) for r in rows]
+
+
+async def cancel_reminder(pool: SQLitePool, chat_id: int, reminder_id: int) -> bool:
+    deleted = await pool.execute(
+        "DELETE FROM reminders WHERE id=? AND chat_id=? AND sent_at IS NULL",
+        reminder_id,
+        chat_id,
+    )
+    return deleted == 1
+
+
+async def get_song_state(pool: SQLitePool, chat_id: int) -> Optional[bytes]:
+    return await pool.fetchval("SELECT seen FROM song_state WHERE chat_id=?", chat_id)
+
+
+async def save_song_states(pool: SQLitePool, items: List[Tuple[int, bytes]]) -> None:
+    if not items:
+        return
+    now = _now()
+    await pool.executemany(
+        "INSERT INTO song_state (chat_id, seen, updated_at) VALUES (?, ?, ?) "
+        "ON CONFLICT (chat_id) DO UPDATE SET seen=excluded.seen, updated_at=excluded.updated_at",
+        [(chat_id, seen, now) for chat_id, seen in items],
+    )
+
+
+async def set_quiz_state(pool: SQLitePool, chat_id: int, correct_option: str) -> None:
+    await pool.execute(
+        "INSERT INTO quiz_state (chat_id, correct_option, asked_at) VALUES (?, ?, ?) "
+        "ON CONFLICT (chat_id) DO UPDATE SET correct_option=excluded.correct_option, asked_at=excluded.asked_at",
+        chat_id,
+        correct_option,
+        _now(),
+    )
+
+
+async def get_quiz_state(pool: SQLitePool, chat_id: int):
+    row = await pool.fetchrow(
+        "SELECT correct_option, asked_at FROM quiz_state WHERE chat_id=?",
+        chat_id,
+    )
+    if not row:
+        return None
+    return str(row["correct_option"]), _dt(row["asked_at"])
+
+
+async def clear_quiz_state(pool: SQLitePool, chat_id: int) -> None:
+    await pool.execute("DELETE FROM quiz_state WHERE chat_id=?", chat_id)
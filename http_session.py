@@ -0,0 +1,49 @@
+import asyncio
+import ssl
+from typing import Optional
+
+import certifi
+from aiogram import __version__ as aiogram_version
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiohttp import ClientSession, TCPConnector
+from aiohttp.hdrs import USER_AGENT
+
+
+# AiohttpSession builds its TCPConnector inside create_session() and offers no way to pass
+# connector options, so this subclass owns the ClientSession itself. It only overrides the
+# public create_session()/close() hooks that make_request() goes through; proxies are not
+# supported.
+class TunedAiohttpSession(AiohttpSession):
+    def __init__(
+        self,
+        limit: int = 100,
+        keepalive_timeout: float = 60,
+        ttl_dns_cache: Optional[int] = 600,
+        **kwargs,
+    ) -> None:
+        super().__init__(**kwargs)
+        self._connector_options = {
+            "limit": limit,
+            "keepalive_timeout": keepalive_timeout,
+            "ttl_dns_cache": ttl_dns_cache,
+            "use_dns_cache": ttl_dns_cache is not None,
+        }
+        self._tuned_session: Optional[ClientSession] = None
+
+    async def create_session(self) -> ClientSession:
+        if self._tuned_session is None or self._tuned_session.closed:
+            connector = TCPConnector(
+                ssl=ssl.create_default_context(cafile=certifi.where()),
+                **self._connector_options,
+            )
+            self._tuned_session = ClientSession(
+                connector=connector,
+                headers={USER_AGENT: f"aiogram/{aiogram_version}"},
+            )
+        return self._tuned_session
+
+    async def close(self) -> None:
+        if self._tuned_session is not None and not self._tuned_session.closed:
+            await self._tuned_session.close()
+            # Same grace period aiogram uses to let SSL connections shut down.
+            await asyncio.sleep(0.25)
@@ -0,0 +1,42 @@
+# The storage interface: every backend module (db for Postgres, db_sqlite for SQLite) must
+# export these names with the same signatures and return shapes. app.py only calls the
+# backend through them, and check_backend() rejects a module that has drifted at startup.
+STORAGE_FUNCTIONS = (
+    "create_pool",
+    "init_db",
+    # users
+    "add_user",
+    "remove_user",
+    "list_users",
+    "list_user_timezones",
+    "list_users_in_timezones",
+    "get_user_tz",
+    "update_user_tz",
+    "get_user_lang",
+    "update_user_lang",
+    # reminders
+    "add_reminder",
+    "fetch_due_reminders",
+    "mark_reminders_sent",
+    "reschedule_reminders",
+    "list_pending_reminders",
+    "cancel_reminder",
+    # broadcast schedule state
+    "get_broadcast_state",
+    "set_broadcast_dates",
+    # song rotation state
+    "get_song_state",
+    "save_song_states",
+    # quiz state
+    "set_quiz_state",
+    "get_quiz_state",
+    "clear_quiz_state",
+)
+
+
+def check_backend(module) -> None:
+    missing = [name for name in STORAGE_FUNCTIONS if not callable(getattr(module, name, None))]
+    if not hasattr(module, "Pool"):
+        missing.append("Pool")
+    if missing:
+        raise RuntimeError(f"Storage backend {module.__name__} is missing: {', '.join(missing)}")
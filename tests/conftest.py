@@ -0,0 +1,98 @@
+import asyncio
+import os
+import sys
+import uuid
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db_sqlite  # noqa: E402
+
+POSTGRES_URL = os.getenv("DATABASE_URL", "")
+HAS_POSTGRES = POSTGRES_URL.startswith(("postgres://", "postgresql://"))
+
+
+class Backend:
+    """One storage backend on a fresh, empty database for a single test."""
+
+    def __init__(self, name: str, tmp_path) -> None:
+        self.name = name
+        self.tmp_path = tmp_path
+        if name == "postgres":
+            import db
+
+            self.module = db
+        else:
+            self.module = db_sqlite
+
+    def run(self, scenario) -> None:
+        asyncio.run(self._run(scenario))
+
+    async def _run(self, scenario) -> None:
+        if self.name == "postgres":
+            import asyncpg
+
+            # A throwaway schema keeps the tests away from the real tables.
+            schema = f"conformance_{uuid.uuid4().hex[:12]}"
+            admin = await asyncpg.connect(POSTGRES_URL)
+            await admin.execute(f"CREATE SCHEMA {schema}")
+            pool = await asyncpg.create_pool(
+                POSTGRES_URL, min_size=1, max_size=5, server_settings={"search_path": schema}
+            )
+            try:
+                await self.module.init_db(pool)
+                await scenario(self.module, pool)
+            finally:
+                await pool.close()
+                await admin.execute(f"DROP SCHEMA {schema} CASCADE")
+                await admin.close()
+        else:
+            pool = await db_sqlite.create_pool(f"sqlite:///{self.tmp_path / 'bot.db'}")
+            try:
+                await self.module.init_db(pool)
+                await scenario(self.module, pool)
+            finally:
+                await pool.close()
+
+
+@pytest.fixture(
+    params=[
+        "sqlite",
+        pytest.param(
+            "postgres",
+            marks=pytest.mark.skipif(not HAS_POSTGRES, reason="DATABASE_URL is not a Postgres URL"),
+        ),
+    ]
+)
+def backend(request, tmp_path) -> Backend:
+    return Backend(request.param, tmp_path)
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path) -> Backend:
+    return Backend("sqlite", tmp_path)
+
+
+async def _no_wait() -> None:
+    pass
+
+
+@pytest.fixture
+def bot_app(monkeypatch):
+    """The app module wired to db_sqlite, with the global send-rate limiter switched off."""
+    # app reads its configuration at import time.
+    os.environ.setdefault("BOT_TOKEN", "42:test")
+    os.environ.setdefault("DATABASE_URL", "sqlite:///unused.db")
+    for name, filename in (
+        ("WORDS_FILE", "words.json"),
+        ("SONGS_FILE", "songs.json"),
+        ("BROADCASTS_FILE", "broadcasts.json"),
+    ):
+        os.environ.setdefault(name, os.path.join(ROOT, filename))
+    import app
+
+    monkeypatch.setattr(app, "db", db_sqlite)
+    monkeypatch.setattr(app, "wait_send_budget", _no_wait)
+    return app
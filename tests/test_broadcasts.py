@@ -0,0 +1,99 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+
+def test_new_timezone_does_not_replay_after_restart(bot_app, sqlite_backend):
+    app = bot_app
+    tz_name = "America/Los_Angeles"
+    # 23:30 in Los Angeles: every slot of the day has already passed there.
+    now = datetime(2026, 3, 2, 7, 30, tzinfo=timezone.utc)
+
+    async def scenario(m, pool):
+        await app.settle_new_timezone(pool, {}, tz_name, now)
+
+        # What the broadcast loop sees after a restart.
+        state = await m.get_broadcast_state(pool)
+        local_now = now.astimezone(app.ZoneInfo(tz_name))
+        for slot in app.BROADCASTS:
+            last_date = state.get(app.broadcast_state_key(slot["key"], tz_name))
+            assert app.next_fire_time(slot, last_date, local_now) > local_now, slot["key"]
+
+    sqlite_backend.run(scenario)
+
+
+def test_new_timezone_keeps_todays_remaining_slots(bot_app, sqlite_backend):
+    app = bot_app
+    tz_name = "Asia/Tokyo"
+    # 00:30 in Tokyo: only the 00:00-00:30 part of the day has passed.
+    now = datetime(2026, 3, 1, 15, 30, tzinfo=timezone.utc)
+
+    async def scenario(m, pool):
+        state = {}
+        await app.settle_new_timezone(pool, state, tz_name, now)
+        assert state == await m.get_broadcast_state(pool)
+        local_now = now.astimezone(app.ZoneInfo(tz_name))
+        for slot in app.BROADCASTS:
+            fire_at = app.next_fire_time(
+                slot, state.get(app.broadcast_state_key(slot["key"], tz_name)), local_now
+            )
+            # Slots later today still fire today.
+            assert fire_at.date() == local_now.date(), slot["key"]
+
+    sqlite_backend.run(scenario)
+
+
+@pytest.mark.parametrize(
+    "entry, error",
+    [
+        ({"hour": 9, "minute": 0, "kind": "quiz"}, "missing key"),
+        ({"key": "x", "minute": 0, "kind": "quiz"}, "hour"),
+        ({"key": "x", "hour": 9, "minute": 60, "kind": "quiz"}, "minute"),
+        ({"key": "x", "hour": 9, "minute": 0, "kind": "poll"}, "kind"),
+        ({"key": "x", "hour": 9, "minute": 0, "reply": "water_remindr"}, "water_remindr"),
+        ({"key": "x", "hour": 9, "minute": 0, "kind": "text"}, "None"),
+        ({"key": "daily_words", "hour": 9, "minute": 0, "kind": "quiz"}, "duplicate key"),
+    ],
+)
+def test_load_broadcasts_rejects_bad_entries(bot_app, tmp_path, monkeypatch, entry, error):
+    path = tmp_path / "broadcasts.json"
+    valid = {"key": "water", "hour": 15, "minute": 0, "kind": "text", "reply": "water_reminder"}
+    path.write_text(json.dumps([valid, entry]), encoding="utf-8")
+    monkeypatch.setattr(bot_app, "BROADCASTS_FILE", str(path))
+
+    with pytest.raises(RuntimeError, match=f"entry 1: .*{error}"):
+        bot_app.load_broadcasts()
+
+
+def test_shipped_broadcasts_are_valid(bot_app):
+    assert [slot["key"] for slot in bot_app.load_broadcasts()][0] == "daily_words"
+
+
+def test_broadcast_retry_delay_resets_once_state_loads(bot_app, monkeypatch):
+    app = bot_app
+    loads = iter([False, False, True, True])
+    delays = []
+
+    async def load_broadcast_state(pool):
+        if not next(loads):
+            raise ConnectionError("database is starting up")
+        return {}, set()
+
+    async def broadcast_loop(bot, pool, state, known_timezones):
+        raise RuntimeError("unrelated failure")
+
+    async def sleep(delay):
+        delays.append(delay)
+        if len(delays) == 4:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(app, "load_broadcast_state", load_broadcast_state)
+    monkeypatch.setattr(app, "broadcast_loop", broadcast_loop)
+    monkeypatch.setattr(app.asyncio, "sleep", sleep)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(app.run_scheduled_broadcasts(None, None))
+    retry = app.BROADCAST_RETRY_SECONDS
+    assert delays == [retry, retry * 2, retry, retry]
@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+class FakeBot:
+    def __init__(self, failing_chats=()) -> None:
+        self.failing_chats = set(failing_chats)
+        self.sent = []
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        if chat_id in self.failing_chats:
+            raise RuntimeError("Bad Request: chat not found")
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def app(bot_app, monkeypatch):
+    monkeypatch.setattr(bot_app, "CATCHUP_POLICY", "late")
+    monkeypatch.setattr(bot_app, "CATCHUP_STALE", timedelta(minutes=30))
+    return bot_app
+
+
+def due_message(app, text: str) -> str:
+    return app.REPLIES["tr"]["reminder_due"].format(text=text)
+
+
+def late_message(app, text: str, minutes: int) -> str:
+    note = app.REPLIES["tr"]["reminder_late"].format(minutes=minutes)
+    return due_message(app, text) + "\n\n" + note
+
+
+def ago(**kwargs) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(**kwargs)
+
+
+def test_stale_failure_is_given_up_and_lag_reflects_pending(app, sqlite_backend):
+    async def scenario(m, pool):
+        bot = FakeBot(failing_chats={9})
+        await m.add_reminder(pool, 9, ago(hours=3), "stale, chat gone")
+        await m.add_reminder(pool, 9, ago(hours=2), "stale daily, chat gone", "daily")
+        await m.add_reminder(pool, 9, ago(minutes=2), "live, chat gone")
+        await m.add_reminder(pool, 1, ago(hours=1), "stale ok")
+
+        await app.check_reminders(bot, pool)
+
+        assert [text for _, text in bot.sent] == [late_message(app, "stale ok", 60)]
+        pending = await m.list_pending_reminders(pool, 9)
+        # The live failure stays for a retry, the stale daily one moves to its next occurrence.
+        assert [text for _, _, text, _ in pending] == ["live, chat gone", "stale daily, chat gone"]
+        assert pending[1][1] > datetime.now(timezone.utc)
+        assert 60 <= app.METRICS["catchup_lag_seconds"] < 30 * 60
+
+        # Once the live one turns stale too, nothing is left to pin the metric.
+        await m.reschedule_reminders(pool, [(pending[0][0], ago(hours=1))])
+        await app.check_reminders(bot, pool)
+        assert await m.fetch_due_reminders(pool, datetime.now(timezone.utc)) == []
+        assert app.METRICS["catchup_lag_seconds"] == 0.0
+
+    sqlite_backend.run(scenario)
+
+
+def test_live_failure_is_retried_next_tick(app, sqlite_backend):
+    async def scenario(m, pool):
+        bot = FakeBot(failing_chats={1})
+        await m.add_reminder(pool, 1, ago(minutes=1), "live")
+        await app.check_reminders(bot, pool)
+        assert bot.sent == []
+
+        bot.failing_chats.clear()
+        await app.check_reminders(bot, pool)
+        assert [chat_id for chat_id, _ in bot.sent] == [1]
+        assert await m.list_pending_reminders(pool, 1) == []
+
+    sqlite_backend.run(scenario)
+
+
+def test_live_reminders_go_before_backlog(app, sqlite_backend, monkeypatch):
+    monkeypatch.setattr(app, "REMINDER_TICK_BUDGET", 2)
+
+    async def scenario(m, pool):
+        bot = FakeBot()
+        for hours in (3, 2, 1):
+            await m.add_reminder(pool, 1, ago(hours=hours), f"backlog {hours}h")
+        await m.add_reminder(pool, 1, ago(minutes=5), "live 5m")
+        await m.add_reminder(pool, 1, ago(minutes=1), "live 1m")
+
+        await app.check_reminders(bot, pool)
+        assert [text for _, text in bot.sent] == [
+            due_message(app, "live 5m"),
+            due_message(app, "live 1m"),
+        ]
+        assert app.METRICS["catchup_lag_seconds"] >= 3 * 3600
+
+        await app.check_reminders(bot, pool)
+        assert [text for _, text in bot.sent[2:]] == [
+            late_message(app, "backlog 3h", 180),
+            late_message(app, "backlog 2h", 120),
+        ]
+
+    sqlite_backend.run(scenario)
+
+
+def test_backlog_pages_across_ticks_within_budget(app, sqlite_backend, monkeypatch):
+    monkeypatch.setattr(app, "REMINDER_TICK_BUDGET", 3)
+    monkeypatch.setattr(app, "CATCHUP_BATCH_SIZE", 2)
+    monkeypatch.setattr(app, "CATCHUP_POLICY", "send")
+
+    async def scenario(m, pool):
+        bot = FakeBot()
+        # Pairs share remind_at, so paging has to continue on the id part of the cursor.
+        for i in range(7):
+            await m.add_reminder(pool, 1, ago(hours=10 - i // 2), f"r{i}")
+
+        for expected in (["r0", "r1", "r2"], ["r3", "r4", "r5"], ["r6"], []):
+            bot.sent.clear()
+            await app.check_reminders(bot, pool)
+            assert [text for _, text in bot.sent] == [due_message(app, t) for t in expected]
+        assert await m.list_pending_reminders(pool, 1) == []
+        assert app.METRICS["catchup_lag_seconds"] == 0.0
+
+    sqlite_backend.run(scenario)
+
+
+@pytest.mark.parametrize("policy", ["send", "late", "drop"])
+def test_stale_policy(app, sqlite_backend, monkeypatch, policy):
+    monkeypatch.setattr(app, "CATCHUP_POLICY", policy)
+
+    async def scenario(m, pool):
+        bot = FakeBot()
+        await m.add_reminder(pool, 1, ago(hours=2), "once")
+        await m.add_reminder(pool, 1, ago(hours=2, minutes=1), "daily", "daily")
+        await m.add_reminder(pool, 1, ago(minutes=1), "live")
+
+        await app.check_reminders(bot, pool)
+
+        texts = [text for _, text in bot.sent]
+        if policy == "send":
+            assert texts == [
+                due_message(app, "live"),
+                due_message(app, "daily"),
+                due_message(app, "once"),
+            ]
+        elif policy == "late":
+            assert texts == [
+                due_message(app, "live"),
+                late_message(app, "daily", 121),
+                late_message(app, "once", 120),
+            ]
+        else:
+            # Only the live reminder is sent; stale ones are dropped without a message.
+            assert texts == [due_message(app, "live")]
+
+        # Either way the one-shot rows are done and the daily one is re-armed at the same
+        # local time on its next occurrence.
+        pending = await m.list_pending_reminders(pool, 1)
+        assert [(text, recur) for _, _, text, recur in pending] == [("daily", "daily")]
+        remind_at = pending[0][1]
+        assert remind_at > datetime.now(timezone.utc)
+        assert remind_at - ago(hours=2, minutes=1) < timedelta(days=1, minutes=1)
+        assert app.METRICS["catchup_lag_seconds"] == 0.0
+
+    sqlite_backend.run(scenario)
+
+
+def test_drop_does_not_use_the_send_budget(app, sqlite_backend, monkeypatch):
+    monkeypatch.setattr(app, "CATCHUP_POLICY", "drop")
+    monkeypatch.setattr(app, "REMINDER_TICK_BUDGET", 2)
+    monkeypatch.setattr(app, "CATCHUP_BATCH_SIZE", 2)
+
+    async def scenario(m, pool):
+        bot = FakeBot()
+        for i in range(5):
+            await m.add_reminder(pool, 1, ago(hours=5 - i), f"stale {i}")
+        await m.add_reminder(pool, 1, ago(minutes=1), "live")
+
+        # The live send leaves one attempt for the backlog, which is enough to drop all
+        # three pages of it in the same tick.
+        await app.check_reminders(bot, pool)
+        assert [text for _, text in bot.sent] == [due_message(app, "live")]
+        assert await m.list_pending_reminders(pool, 1) == []
+
+    sqlite_backend.run(scenario)
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+
+class FakeMessage:
+    def __init__(self, text: str, chat_id: int = 1) -> None:
+        self.text = text
+        self.chat = SimpleNamespace(id=chat_id)
+        self.answers = []
+
+    async def answer(self, text: str, **kwargs) -> None:
+        self.answers.append(text)
+
+
+def send(app, pool, text: str):
+    message = FakeMessage(text)
+
+    async def run():
+        await app.handle_message(message, None, pool)
+        return message.answers, await app.db.list_pending_reminders(pool, 1)
+
+    return run()
+
+
+def test_recurrence_phrase_without_verb_is_not_a_reminder(bot_app, sqlite_backend):
+    async def scenario(m, pool):
+        for text in ("я думаю о тебе каждый день", "я просыпаюсь каждый день в 7"):
+            answers, pending = await send(bot_app, pool, text)
+            assert answers == [], text
+            assert pending == [], text
+
+    sqlite_backend.run(scenario)
+
+
+def test_reminder_verb_sets_recurring_reminder(bot_app, sqlite_backend):
+    async def scenario(m, pool):
+        answers, pending = await send(bot_app, pool, "напомни каждый день в 7 выпить воду")
+        replies = bot_app.REPLIES["ru"]
+        expected = replies["reminder_set_recurring"].format(time="07:00", rule=replies["recur_daily"])
+        assert answers == [expected]
+        assert [(text, recur) for _, _, text, recur in pending] == [
+            ("напомни каждый день в 7 выпить воду", "daily")
+        ]
+
+    sqlite_backend.run(scenario)
+
+
+def test_reminder_verb_without_time_asks_for_one(bot_app, sqlite_backend):
+    async def scenario(m, pool):
+        answers, pending = await send(bot_app, pool, "her gün hatırlat")
+        assert len(answers) == 1 and "Hangi saat" in answers[0]
+        assert pending == []
+
+    sqlite_backend.run(scenario)
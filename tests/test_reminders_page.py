@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Chat, Message
+
+
+class ListingMessage(Message):
+    """A reminders listing whose edits behave like Telegram's."""
+
+    async def edit_text(self, text: str, **kwargs) -> None:
+        shown = self.__dict__.setdefault("shown", [])
+        if shown and shown[-1] == text:
+            raise TelegramBadRequest(
+                method=None, message="Bad Request: message is not modified: specified new message"
+            )
+        shown.append(text)
+
+
+def make_callback(message, data: str):
+    answers = []
+
+    async def answer(text=None, **kwargs) -> None:
+        answers.append(text)
+
+    return SimpleNamespace(data=data, message=message, answer=answer), answers
+
+
+def test_double_tap_on_cancel_answers_instead_of_failing(bot_app, sqlite_backend):
+    app = bot_app
+
+    async def scenario(m, pool):
+        await m.add_user(pool, 1, "ru")
+        remind_at = datetime.now(timezone.utc) + timedelta(hours=1)
+        await m.add_reminder(pool, 1, remind_at, "first")
+        await m.add_reminder(pool, 1, remind_at, "second")
+        first, _ = await m.list_pending_reminders(pool, 1)
+        data = f"rem:del:{first[0]}:{app.encode_reminder_cursor(first)}"
+
+        message = ListingMessage.model_construct(
+            message_id=1, date=datetime.now(timezone.utc), chat=Chat(id=1, type="private")
+        )
+        replies = app.REPLIES["ru"]
+        for expected in ("reminder_cancelled", "reminder_missing"):
+            callback, answers = make_callback(message, data)
+            await app.handle_reminders_page(callback, pool)
+            assert answers == [replies[expected]]
+        assert len(message.shown) == 1
+
+    sqlite_backend.run(scenario)
+
+
+def test_malformed_payload_is_answered(bot_app, sqlite_backend):
+    async def scenario(m, pool):
+        message = ListingMessage.model_construct(
+            message_id=1, date=datetime.now(timezone.utc), chat=Chat(id=1, type="private")
+        )
+        for data in ("rem:del:x:1:2", "rem:next:99999999999999999999999:1", "rem:"):
+            callback, answers = make_callback(message, data)
+            await bot_app.handle_reminders_page(callback, pool)
+            assert answers == [None]
+
+    sqlite_backend.run(scenario)
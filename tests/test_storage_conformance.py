@@ -0,0 +1,207 @@
+"""The same storage scenarios against every backend: db_sqlite always, db (Postgres) when
+DATABASE_URL points at a Postgres server."""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+import db
+import db_sqlite
+from storage import STORAGE_FUNCTIONS, check_backend
+
+T0 = datetime(2026, 3, 1, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("module", [db, db_sqlite], ids=["postgres", "sqlite"])
+def test_backend_implements_interface(module):
+    check_backend(module)
+    for name in STORAGE_FUNCTIONS:
+        assert callable(getattr(module, name)), name
+
+
+def test_check_backend_rejects_incomplete_module():
+    class Partial:
+        __name__ = "partial"
+        Pool = object
+
+        @staticmethod
+        async def init_db(pool):
+            pass
+
+    with pytest.raises(RuntimeError, match="add_user"):
+        check_backend(Partial)
+
+
+def test_init_db_is_idempotent(backend):
+    async def scenario(m, pool):
+        await m.add_user(pool, 1)
+        await m.init_db(pool)
+        assert await m.list_users(pool) == [(1, "tr")]
+
+    backend.run(scenario)
+
+
+def test_users_lang_and_timezones(backend):
+    async def scenario(m, pool):
+        await m.add_user(pool, 1)
+        await m.add_user(pool, 2, "en")
+        await m.add_user(pool, 2, "tr")  # existing users keep their language
+        await m.add_user(pool, 3)
+        assert sorted(await m.list_users(pool)) == [(1, "tr"), (2, "en"), (3, "tr")]
+
+        assert await m.get_user_lang(pool, 2) == "en"
+        await m.update_user_lang(pool, 2, "tr")
+        assert await m.get_user_lang(pool, 2) == "tr"
+        assert await m.get_user_lang(pool, 99) is None
+
+        assert await m.get_user_tz(pool, 1) is None
+        await m.update_user_tz(pool, 1, "Europe/Berlin")
+        await m.update_user_tz(pool, 2, "Asia/Tokyo")
+        assert await m.get_user_tz(pool, 1) == "Europe/Berlin"
+        assert sorted(await m.list_user_timezones(pool), key=str) == [
+            "Asia/Tokyo",
+            "Europe/Berlin",
+            None,
+        ]
+
+        berlin = await m.list_users_in_timezones(pool, ["Europe/Berlin"])
+        assert berlin == [(1, "tr")]
+        with_default = await m.list_users_in_timezones(pool, ["Europe/Berlin"], True)
+        assert sorted(with_default) == [(1, "tr"), (3, "tr")]
+        assert await m.list_users_in_timezones(pool, []) == []
+
+        await m.remove_user(pool, 3)
+        assert sorted(await m.list_users(pool)) == [(1, "tr"), (2, "tr")]
+
+    backend.run(scenario)
+
+
+def test_fetch_due_reminders_keyset(backend):
+    async def scenario(m, pool):
+        await m.add_user(pool, 1)
+        await m.update_user_tz(pool, 1, "Europe/Berlin")
+        # Two rows share remind_at so the id part of the cursor matters.
+        await m.add_reminder(pool, 1, T0, "a")
+        await m.add_reminder(pool, 2, T0, "b", "daily")
+        await m.add_reminder(pool, 1, T0 + timedelta(minutes=1), "c", "weekly")
+        await m.add_reminder(pool, 1, T0 + timedelta(hours=1), "later")
+
+        due = await m.fetch_due_reminders(pool, T0 + timedelta(minutes=5))
+        assert [(r[2], r[4], r[5]) for r in due] == [
+            ("a", None, "Europe/Berlin"),
+            ("b", "daily", None),
+            ("c", "weekly", "Europe/Berlin"),
+        ]
+        assert [r[1] for r in due] == [1, 2, 1]
+        assert due[0][3] == T0
+
+        first = await m.fetch_due_reminders(pool, T0 + timedelta(minutes=5), limit=1)
+        assert [r[2] for r in first] == ["a"]
+        rest = await m.fetch_due_reminders(
+            pool, T0 + timedelta(minutes=5), limit=10, cursor=(first[0][3], first[0][0])
+        )
+        assert [r[2] for r in rest] == ["b", "c"]
+
+    backend.run(scenario)
+
+
+def test_mark_sent_and_reschedule(backend):
+    async def scenario(m, pool):
+        await m.add_reminder(pool, 1, T0, "once")
+        await m.add_reminder(pool, 1, T0, "daily", "daily")
+        once, daily = await m.fetch_due_reminders(pool, T0)
+
+        await m.mark_reminders_sent(pool, [once[0]], T0)
+        await m.reschedule_reminders(pool, [(daily[0], T0 + timedelta(days=1))])
+        await m.mark_reminders_sent(pool, [], T0)
+        await m.reschedule_reminders(pool, [])
+
+        assert await m.fetch_due_reminders(pool, T0) == []
+        pending = await m.list_pending_reminders(pool, 1)
+        assert pending == [(daily[0], T0 + timedelta(days=1), "daily", "daily")]
+
+    backend.run(scenario)
+
+
+def test_list_pending_reminders_pages(backend):
+    async def scenario(m, pool):
+        for i in range(5):
+            await m.add_reminder(pool, 1, T0 + timedelta(minutes=i // 2), f"r{i}")
+        await m.add_reminder(pool, 2, T0, "other chat")
+
+        page1 = await m.list_pending_reminders(pool, 1, limit=2)
+        assert [r[2] for r in page1] == ["r0", "r1"]
+        last = (page1[-1][1], page1[-1][0])
+        page2 = await m.list_pending_reminders(pool, 1, limit=2, cursor=last, direction="next")
+        assert [r[2] for r in page2] == ["r2", "r3"]
+
+        first = (page2[0][1], page2[0][0])
+        same = await m.list_pending_reminders(pool, 1, limit=2, cursor=first, direction="from")
+        assert [r[2] for r in same] == ["r2", "r3"]
+        back = await m.list_pending_reminders(pool, 1, limit=2, cursor=first, direction="prev")
+        assert [r[2] for r in back] == ["r0", "r1"]
+        head = (page1[0][1], page1[0][0])
+        assert await m.list_pending_reminders(pool, 1, 2, head, "prev") == []
+
+        tail = (page2[-1][1], page2[-1][0])
+        assert [r[2] for r in await m.list_pending_reminders(pool, 1, 2, tail, "next")] == ["r4"]
+
+    backend.run(scenario)
+
+
+def test_cancel_reminder(backend):
+    async def scenario(m, pool):
+        await m.add_reminder(pool, 1, T0, "mine")
+        await m.add_reminder(pool, 1, T0, "sent")
+        mine, sent = await m.list_pending_reminders(pool, 1)
+        await m.mark_reminders_sent(pool, [sent[0]], T0)
+
+        assert await m.cancel_reminder(pool, 2, mine[0]) is False
+        assert await m.cancel_reminder(pool, 1, sent[0]) is False
+        assert await m.cancel_reminder(pool, 1, mine[0]) is True
+        assert await m.cancel_reminder(pool, 1, mine[0]) is False
+        assert await m.list_pending_reminders(pool, 1) == []
+
+    backend.run(scenario)
+
+
+def test_broadcast_state(backend):
+    async def scenario(m, pool):
+        assert await m.get_broadcast_state(pool) == {}
+        day = date(2026, 3, 1)
+        await m.set_broadcast_dates(pool, ["eat", "eat@Asia/Tokyo"], day)
+        await m.set_broadcast_dates(pool, ["eat"], day + timedelta(days=1))
+        await m.set_broadcast_dates(pool, [], day)
+        assert await m.get_broadcast_state(pool) == {
+            "eat": day + timedelta(days=1),
+            "eat@Asia/Tokyo": day,
+        }
+
+    backend.run(scenario)
+
+
+def test_song_state(backend):
+    async def scenario(m, pool):
+        assert await m.get_song_state(pool, 1) is None
+        await m.save_song_states(pool, [(1, b"\x01"), (2, b"\x00\xff")])
+        await m.save_song_states(pool, [(1, b"\x03")])
+        await m.save_song_states(pool, [])
+        assert bytes(await m.get_song_state(pool, 1)) == b"\x03"
+        assert bytes(await m.get_song_state(pool, 2)) == b"\x00\xff"
+
+    backend.run(scenario)
+
+
+def test_quiz_state(backend):
+    async def scenario(m, pool):
+        assert await m.get_quiz_state(pool, 1) is None
+        await m.set_quiz_state(pool, 1, "A")
+        await m.set_quiz_state(pool, 1, "C")
+        option, asked_at = await m.get_quiz_state(pool, 1)
+        assert option == "C"
+        assert isinstance(asked_at, datetime) and asked_at.tzinfo is not None
+
+        await m.clear_quiz_state(pool, 1)
+        await m.clear_quiz_state(pool, 1)
+        assert await m.get_quiz_state(pool, 1) is None
+
+    backend.run(scenario)